@@ -0,0 +1,65 @@
+"""
+File-based cache with atomic ``incr`` and ``add``.
+
+Django's file backend implements ``incr`` and ``add`` as a read followed
+by a write, so two processes can both turn 4 into 5 or both add the same
+key. Shared counters such as the kitchen generation depend on every
+increment returning a distinct value. Here both operations run under an
+exclusive ``flock`` on a lock file in the cache directory, which makes
+them atomic across every process sharing that directory. Plain ``set``
+and ``get`` are unchanged.
+
+Where ``fcntl`` is unavailable the lock only covers threads of one
+process; use a cache server such as Redis or Memcached there.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+LOCK_FILENAME = 'counters.lock'
+
+
+class LockingFileBasedCache(FileBasedCache):
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            self._createdir()
+            with open(os.path.join(self._dir, LOCK_FILENAME), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._locked():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self._locked():
+            return super().incr(key, delta, version)
+
+    async def aadd(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return await sync_to_async(self.add)(key, value, timeout, version)
+
+    async def aincr(self, key, delta=1, version=None):
+        return await sync_to_async(self.incr)(key, delta, version)
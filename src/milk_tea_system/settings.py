@@ -2,6 +2,7 @@
 Django settings for milk_tea_system project.
 """
 
+import os
 from pathlib import Path
 
 
@@ -27,6 +28,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'ordering.middleware.request_metrics_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -40,10 +42,15 @@ ROOT_URLCONF = 'milk_tea_system.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'ordering.metrics.InstrumentedTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -57,14 +64,62 @@ TEMPLATES = [
 WSGI_APPLICATION = 'milk_tea_system.wsgi.application'
 
 
+DATABASE_PROFILES = {
+    'development': {},
+    'production': {
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'timeout': 20},
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 20000,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -32000,
+            'temp_store': 'MEMORY',
+        },
+        'IMMEDIATE_TRANSACTIONS': True,
+    },
+}
+
+DATABASE_PROFILE = os.environ.get('MILK_TEA_DB_PROFILE', 'development')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'milk_tea_system.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        **DATABASE_PROFILES[DATABASE_PROFILE],
     }
 }
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'milk_tea_system.filecache.LockingFileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'default',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'sessions',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+SESSION_STORE = os.environ.get('MILK_TEA_SESSION_STORE', 'cache')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_STORE]
+SESSION_CACHE_ALIAS = 'sessions'
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -88,9 +143,36 @@ USE_TZ = True
 
 
 STATIC_URL = '/static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'milk_tea_system.staticfiles.CompressedManifestStaticFilesStorage',
+    },
+}
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+REQUEST_QUERY_BUDGET = int(os.environ.get('MILK_TEA_QUERY_BUDGET', 20))
+REQUEST_LATENCY_BUDGET_MS = int(os.environ.get('MILK_TEA_LATENCY_BUDGET_MS', 500))
+
+KITCHEN_STATIONS = int(os.environ.get('MILK_TEA_KITCHEN_STATIONS', 1))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'ordering.metrics': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
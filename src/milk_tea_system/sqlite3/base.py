@@ -0,0 +1,50 @@
+"""
+SQLite backend with per-connection pragmas and immediate transactions.
+
+``PRAGMAS`` in the database settings are applied to every new connection.
+With ``IMMEDIATE_TRANSACTIONS`` enabled, blocks run under
+``immediate_atomic`` start with ``BEGIN IMMEDIATE``, so concurrent writers
+wait on the busy timeout instead of failing when a read lock cannot be
+upgraded to a write lock.
+"""
+
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.begin_immediate = False
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for pragma, value in self.settings_dict.get('PRAGMAS', {}).items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.begin_immediate:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
+
+
+@contextmanager
+def immediate_atomic(using=None):
+    connection = transaction.get_connection(using)
+    immediate = (
+        isinstance(connection, DatabaseWrapper)
+        and connection.settings_dict.get('IMMEDIATE_TRANSACTIONS', False)
+        and not connection.in_atomic_block
+    )
+    connection.begin_immediate = immediate
+    try:
+        with transaction.atomic(using=using):
+            connection.begin_immediate = False
+            yield
+    finally:
+        connection.begin_immediate = False
@@ -1,8 +1,13 @@
+import re
 
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from .staticfiles import serve_static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    re_path(r'^{}(?P<path>.*)$'.format(re.escape(settings.STATIC_URL.lstrip('/'))), serve_static),
     path('', include('ordering.urls')),
 ]
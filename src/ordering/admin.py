@@ -1,41 +1,174 @@
+"""
+Admin for the catalog, orders and payments.
+
+The order and payment changelists have to stay fast on tables with
+hundreds of thousands of rows. Each page issues a fixed number of queries.
+The row query joins everything the columns display, and the page count
+comes from one bounded query instead of a full ``COUNT(*)``. The date
+filters are half-open ranges on the indexed ``created_at`` column. Rows
+are listed newest first by that column, so every filter reads its page
+straight off an index that ends in ``created_at`` instead of sorting all
+matching rows by id. Order numbers are searched with an exact match,
+which can use the unique index where the ``iexact`` behind a ``=``
+search field cannot.
+``manage.py check_admin_queries`` verifies the query counts at several
+table sizes.
+"""
+
+from datetime import timedelta
+
 from django.contrib import admin
-from .models import Drink, Flavor, Topping, Size, Order, OrderItem, Payment
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import Drink, Flavor, Topping, Size, Order, OrderItem, Payment, ArchivedOrder
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never counts more than ``count_cap`` rows.
+
+    Filtered querysets report at most ``count_cap`` rows, which limits how
+    far the page links go but not what the filters can find. Unfiltered
+    querysets past the cap report the primary key span. That is exact
+    until rows are deleted or archived, and an upper bound after that.
+    """
+
+    count_cap = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        capped = queryset.order_by().values('pk')[:self.count_cap + 1]
+        sql, params = capped.query.sql_with_params()
+        columns = [f'(SELECT COUNT(*) FROM ({sql}) capped)']
+        unfiltered = not queryset.query.where
+        if unfiltered:
+            meta = queryset.model._meta
+            pk = connections[queryset.db].ops.quote_name(meta.pk.column)
+            table = connections[queryset.db].ops.quote_name(meta.db_table)
+            columns.append(f'(SELECT MAX({pk}) FROM {table}) - (SELECT MIN({pk}) FROM {table}) + 1')
+
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f'SELECT {", ".join(columns)}', params)
+            row = cursor.fetchone()
+        if row[0] <= self.count_cap:
+            return row[0]
+        return row[1] if unfiltered else self.count_cap
+
+
+class CreatedBucketFilter(admin.SimpleListFilter):
+    title = 'created'
+    parameter_name = 'created'
+
+    BUCKETS = [
+        ('hour', 'Past hour'),
+        ('today', 'Today'),
+        ('yesterday', 'Yesterday'),
+        ('week', 'Past 7 days'),
+        ('month', 'Past 30 days'),
+        ('older', 'Older than 30 days'),
+    ]
+
+    def lookups(self, request, model_admin):
+        return self.BUCKETS
+
+    def bounds(self, bucket):
+        now = timezone.now()
+        today = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+        return {
+            'hour': (now - timedelta(hours=1), None),
+            'today': (today, None),
+            'yesterday': (today - timedelta(days=1), today),
+            'week': (now - timedelta(days=7), None),
+            'month': (now - timedelta(days=30), None),
+            'older': (None, now - timedelta(days=30)),
+        }.get(bucket)
+
+    def queryset(self, request, queryset):
+        bounds = self.bounds(self.value())
+        if bounds is None:
+            return queryset
+        start, end = bounds
+        if start is not None:
+            queryset = queryset.filter(created_at__gte=start)
+        if end is not None:
+            queryset = queryset.filter(created_at__lt=end)
+        return queryset
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ['-created_at']
 
 
 @admin.register(Drink)
 class DrinkAdmin(admin.ModelAdmin):
     list_display = ['name', 'base_price', 'is_available']
     list_filter = ['is_available']
+    search_fields = ['name']
 
 
 @admin.register(Flavor)
 class FlavorAdmin(admin.ModelAdmin):
     list_display = ['name', 'additional_price']
+    search_fields = ['name']
 
 
 @admin.register(Topping)
 class ToppingAdmin(admin.ModelAdmin):
     list_display = ['name', 'price']
+    search_fields = ['name']
 
 
 @admin.register(Size)
 class SizeAdmin(admin.ModelAdmin):
     list_display = ['name', 'price_multiplier']
+    search_fields = ['name']
 
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
+    autocomplete_fields = ['drink', 'size', 'flavor', 'toppings']
+    exclude = ['topping_prices']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('drink', 'size', 'flavor').prefetch_related('toppings')
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdmin):
     list_display = ['order_number', 'status', 'total_amount', 'created_at']
-    list_filter = ['status', 'created_at']
+    list_filter = ['status', CreatedBucketFilter]
+    search_fields = ['order_number__exact']
     inlines = [OrderItemInline]
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
-    list_display = ['order', 'payment_method', 'amount', 'status', 'created_at']
-    list_filter = ['payment_method', 'status', 'created_at']
+class PaymentAdmin(LargeTableAdmin):
+    list_display = ['order_number', 'payment_method', 'amount', 'status', 'created_at']
+    list_filter = ['payment_method', 'status', CreatedBucketFilter]
+    list_select_related = ['order']
+    search_fields = ['order__order_number__exact']
+    raw_id_fields = ['order']
+
+    @admin.display(description='Order', ordering='order__order_number')
+    def order_number(self, payment):
+        return payment.order.order_number
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(LargeTableAdmin):
+    list_display = ['order_number', 'status', 'total_amount', 'payment_method', 'created_at', 'archived_at']
+    list_filter = ['payment_method', CreatedBucketFilter]
+    search_fields = ['order_number__exact']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
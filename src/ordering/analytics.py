@@ -0,0 +1,210 @@
+"""
+Pre-aggregated sales analytics.
+
+Every placed order adds its revenue to hourly ``SalesRollup`` buckets for
+drink, size, topping and payment method in the same transaction. Closed
+days are re-aggregated from the raw tables by ``manage.py rollup_sales``,
+which also writes one daily bucket per key. Days whose orders have been
+archived are rolled up before archiving and never re-aggregated. Range
+queries then add up at most one row per key and day instead of scanning
+order history.
+
+Topping revenue uses the topping prices stored on each order item when it
+was placed, on both paths, so a later price change does not rewrite past
+days. Items without a stored price fall back to the current one.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import Order, OrderItem, Payment, SalesRollup, ArchivedOrder
+
+
+DIMENSIONS = [dimension for dimension, _ in SalesRollup.DIMENSION_CHOICES]
+
+
+def hour_bucket(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _add(buckets, key, quantity, revenue):
+    bucket = buckets[key]
+    bucket[0] += quantity
+    bucket[1] += revenue
+
+
+def topping_price(topping_prices, topping_id, current_price=Decimal('0.00')):
+    price = topping_prices.get(str(topping_id))
+    return Decimal(price) if price is not None else current_price
+
+
+def order_buckets(order_items, payment_method, total_amount):
+
+    buckets = defaultdict(lambda: [0, Decimal('0.00')])
+    for item, topping_ids in order_items:
+        _add(buckets, ('drink', str(item.drink_id)), item.quantity, Decimal(str(item.item_price)))
+        _add(buckets, ('size', str(item.size_id)), item.quantity, Decimal(str(item.item_price)))
+        for topping_id in topping_ids:
+            price = topping_price(item.topping_prices, topping_id)
+            _add(buckets, ('topping', str(topping_id)), item.quantity, price * item.quantity)
+    _add(buckets, ('payment_method', payment_method), 1, Decimal(str(total_amount)))
+    return buckets
+
+
+def record_order(created_at, buckets):
+
+    if not buckets:
+        return
+
+    table = connection.ops.quote_name(SalesRollup._meta.db_table)
+    period_field = SalesRollup._meta.get_field('period_start')
+    revenue_field = SalesRollup._meta.get_field('revenue')
+    period_start = period_field.get_db_prep_save(hour_bucket(created_at), connection)
+
+    rows = []
+    params = []
+    for (dimension, key), (quantity, revenue) in buckets.items():
+        rows.append('(%s, %s, %s, %s, %s, %s)')
+        params.extend([
+            'hour', period_start, dimension, key, quantity,
+            revenue_field.get_db_prep_save(revenue, connection),
+        ])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (granularity, period_start, dimension, key, quantity, revenue) '
+            f'VALUES {", ".join(rows)} '
+            'ON CONFLICT (granularity, period_start, dimension, key) DO UPDATE SET '
+            'quantity = quantity + excluded.quantity, revenue = revenue + excluded.revenue',
+            params,
+        )
+
+
+def _hourly_rows(start, end):
+
+    orders = Q(order__created_at__gte=start, order__created_at__lt=end) & ~Q(order__status='pending')
+    hour = TruncHour('order__created_at')
+
+    for dimension in ('drink', 'size'):
+        field = f'{dimension}_id'
+        for row in (
+            OrderItem.objects.filter(orders).annotate(hour=hour)
+            .values('hour', field).annotate(quantity=Sum('quantity'), revenue=Sum('item_price'))
+            .order_by()
+        ):
+            yield 'hour', row['hour'], dimension, str(row[field]), row['quantity'], row['revenue']
+
+    through = OrderItem.toppings.through
+    toppings = defaultdict(lambda: [0, Decimal('0.00')])
+    for period_start, topping_id, quantity, prices, current_price in (
+        through.objects.filter(
+            orderitem__order__created_at__gte=start,
+            orderitem__order__created_at__lt=end,
+        ).exclude(orderitem__order__status='pending')
+        .annotate(hour=TruncHour('orderitem__order__created_at'))
+        .values_list('hour', 'topping_id', 'orderitem__quantity', 'orderitem__topping_prices', 'topping__price')
+        .iterator(chunk_size=5000)
+    ):
+        _add(toppings, (period_start, topping_id), quantity, topping_price(prices, topping_id, current_price) * quantity)
+    for (period_start, topping_id), (quantity, revenue) in toppings.items():
+        yield 'hour', period_start, 'topping', str(topping_id), quantity, revenue
+
+    for row in (
+        Payment.objects.filter(orders).annotate(hour=hour)
+        .values('hour', 'payment_method').annotate(quantity=Count('id'), revenue=Sum('amount'))
+        .order_by()
+    ):
+        yield 'hour', row['hour'], 'payment_method', row['payment_method'], row['quantity'], row['revenue']
+
+
+def rollup_day(day):
+
+    start, end = day_bounds(day)
+    hourly = [
+        SalesRollup(
+            granularity=granularity, period_start=period_start, dimension=dimension,
+            key=key, quantity=quantity, revenue=Decimal(str(revenue or 0)).quantize(Decimal('0.01')),
+        )
+        for granularity, period_start, dimension, key, quantity, revenue in _hourly_rows(start, end)
+    ]
+
+    daily = defaultdict(lambda: [0, Decimal('0.00')])
+    for rollup in hourly:
+        _add(daily, (rollup.dimension, rollup.key), rollup.quantity, rollup.revenue)
+
+    with transaction.atomic():
+        SalesRollup.objects.filter(period_start__gte=start, period_start__lt=end).delete()
+        SalesRollup.objects.bulk_create(hourly, batch_size=500)
+        SalesRollup.objects.bulk_create([
+            SalesRollup(
+                granularity='day', period_start=start, dimension=dimension,
+                key=key, quantity=quantity, revenue=revenue,
+            )
+            for (dimension, key), (quantity, revenue) in daily.items()
+        ], batch_size=500)
+
+    return len(hourly), len(daily)
+
+
+def summarize(start_day, end_day):
+
+    start, _ = day_bounds(start_day)
+    _, end = day_bounds(end_day)
+
+    closed_days = list(
+        SalesRollup.objects.filter(granularity='day', period_start__gte=start, period_start__lt=end)
+        .values_list('period_start', flat=True).distinct()
+    )
+
+    hourly = Q(granularity='hour', period_start__gte=start, period_start__lt=end)
+    for day_start in closed_days:
+        hourly &= ~Q(period_start__gte=day_start, period_start__lt=day_start + timedelta(days=1))
+
+    rows = (
+        SalesRollup.objects.filter(Q(granularity='day', period_start__in=closed_days) | hourly)
+        .values('dimension', 'key')
+        .annotate(total_quantity=Sum('quantity'), total_revenue=Sum('revenue'))
+        .order_by('dimension', '-total_revenue')
+    )
+
+    summary = {dimension: [] for dimension in DIMENSIONS}
+    for row in rows:
+        summary[row['dimension']].append({
+            'key': row['key'],
+            'quantity': row['total_quantity'],
+            'revenue': Decimal(str(row['total_revenue'])).quantize(Decimal('0.01')),
+        })
+    return summary
+
+
+def closed_days_between(first_day, last_day):
+    today = timezone.localdate()
+    day = first_day
+    while day <= last_day and day < today:
+        yield day
+        day += timedelta(days=1)
+
+
+def day_is_archived(day):
+    start, end = day_bounds(day)
+    return ArchivedOrder.objects.filter(created_at__gte=start, created_at__lt=end).exists()
+
+
+def history_bounds():
+    bounds = Order.objects.exclude(status='pending').order_by('created_at').values_list('created_at', flat=True)
+    first = bounds.first()
+    last = bounds.last()
+    if first is None:
+        return None, None
+    return timezone.localtime(first).date(), timezone.localtime(last).date()
@@ -1,6 +1,26 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
 
 
 class OrderingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ordering'
+
+    def ready(self):
+        from .catalog import CATALOG_MODELS, invalidate_menu
+        from .kitchen import record_order_transition, forget_order
+        from .metrics import install_query_recorder
+        from .models import Order
+        from .status_cache import record_order_status, forget_order_status
+
+        for model in CATALOG_MODELS:
+            post_save.connect(invalidate_menu, sender=model, dispatch_uid=f'catalog_save_{model.__name__}')
+            post_delete.connect(invalidate_menu, sender=model, dispatch_uid=f'catalog_delete_{model.__name__}')
+
+        post_save.connect(record_order_status, sender=Order, dispatch_uid='order_status_save')
+        post_delete.connect(forget_order_status, sender=Order, dispatch_uid='order_status_delete')
+        post_save.connect(record_order_transition, sender=Order, dispatch_uid='kitchen_order_save')
+        post_delete.connect(forget_order, sender=Order, dispatch_uid='kitchen_order_delete')
+
+        connection_created.connect(install_query_recorder, dispatch_uid='metrics_query_recorder')
@@ -0,0 +1,170 @@
+"""
+Hot/cold split of the order history.
+
+Completed orders older than a retention window are moved out of the live
+``Order``, ``OrderItem``, topping and ``Payment`` tables into one compact
+``ArchivedOrder`` row each. The row stores the line items as JSON, with
+the catalog names as they were when the order was placed. The live tables
+then only hold recent and active orders, so their indexes stay small
+however long the shop has been running.
+
+``manage.py archive_orders`` moves orders in short batches, each in its
+own transaction, so it can run from cron next to ``rollup_sales`` while
+the shop is open. Before a day is first archived it is rolled up, because
+``rollup_sales`` cannot re-aggregate archived days from the raw tables.
+
+``find_order`` and ``afind_order`` look up an order number in the live
+table first and fall back to the archive. ``ArchivedOrder`` exposes the
+same attributes the order pages read, including ``items.all``.
+"""
+
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.db.models import Prefetch
+from django.http import Http404
+from django.utils import timezone
+
+from milk_tea_system.sqlite3.base import immediate_atomic
+
+from .analytics import day_is_archived, rollup_day
+from .models import Order, OrderItem, Payment, ArchivedOrder, SalesRollup
+
+
+class ArchivedToppings(list):
+
+    def all(self):
+        return self
+
+    def exists(self):
+        return bool(self)
+
+
+class ArchivedItems(list):
+
+    def __init__(self, line_items):
+        super().__init__(
+            SimpleNamespace(
+                quantity=item['quantity'],
+                item_price=item['item_price'],
+                drink=SimpleNamespace(id=item['drink'][0], name=item['drink'][1]),
+                size=SimpleNamespace(id=item['size'][0], name=item['size'][1]),
+                flavor=SimpleNamespace(id=item['flavor'][0], name=item['flavor'][1]) if item['flavor'] else None,
+                toppings=ArchivedToppings(
+                    SimpleNamespace(id=topping_id, name=name) for topping_id, name in item['toppings']
+                ),
+            )
+            for item in line_items
+        )
+
+    def all(self):
+        return self
+
+
+def _line_item(item):
+    return {
+        'quantity': item.quantity,
+        'item_price': str(item.item_price),
+        'drink': [item.drink_id, item.drink.name],
+        'size': [item.size_id, item.size.name],
+        'flavor': [item.flavor_id, item.flavor.name] if item.flavor_id else None,
+        'toppings': [[topping.id, topping.name] for topping in item.toppings.all()],
+    }
+
+
+def archived_from(order):
+    try:
+        payment = order.payment
+    except Payment.DoesNotExist:
+        payment = None
+
+    return ArchivedOrder(
+        order_number=order.order_number,
+        status=order.status,
+        total_amount=order.total_amount,
+        created_at=order.created_at,
+        updated_at=order.updated_at,
+        line_items=[_line_item(item) for item in order.items.all()],
+        payment_method=payment.payment_method if payment else '',
+        payment_status=payment.status if payment else '',
+        payment_amount=payment.amount if payment else None,
+        transaction_id=payment.transaction_id if payment else '',
+        paid_at=payment.created_at if payment else None,
+        preparing_at=order.preparing_at,
+        ready_at=order.ready_at,
+        completed_at=order.completed_at,
+        idempotency_key=order.idempotency_key,
+    )
+
+
+def archivable(cutoff):
+    return Order.objects.filter(status='completed', created_at__lt=cutoff)
+
+
+def roll_up_before_archiving(cutoff):
+
+    rolled = 0
+    today = timezone.localdate()
+    for day_start in archivable(cutoff).datetimes('created_at', 'day', tzinfo=timezone.get_current_timezone()):
+        day = day_start.date()
+        if day >= today or day_is_archived(day):
+            continue
+        if SalesRollup.objects.filter(granularity='day', period_start=day_start).exists():
+            continue
+        rollup_day(day)
+        rolled += 1
+    return rolled
+
+
+def archive_batch(cutoff, batch_size):
+
+    items = OrderItem.objects.select_related('drink', 'size', 'flavor').prefetch_related('toppings')
+    with immediate_atomic():
+        ids = list(archivable(cutoff).order_by('created_at').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return 0
+        orders = (
+            Order.objects.filter(pk__in=ids).select_related('payment')
+            .prefetch_related(Prefetch('items', queryset=items))
+        )
+        ArchivedOrder.objects.bulk_create([archived_from(order) for order in orders])
+        Order.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def archive_orders(days, batch_size=500):
+    """Yield the number of orders moved per batch until nothing older than ``days`` is left."""
+
+    cutoff = timezone.now() - timedelta(days=days)
+    roll_up_before_archiving(cutoff)
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            return
+        yield moved
+
+
+def find_order(order_number, queryset=None):
+
+    queryset = Order.objects.all() if queryset is None else queryset
+    try:
+        return queryset.get(order_number=order_number)
+    except Order.DoesNotExist:
+        pass
+    try:
+        return ArchivedOrder.objects.get(order_number=order_number)
+    except ArchivedOrder.DoesNotExist:
+        raise Http404('No Order matches the given query.')
+
+
+async def afind_order(order_number, queryset=None):
+
+    queryset = Order.objects.all() if queryset is None else queryset
+    try:
+        return await queryset.aget(order_number=order_number)
+    except Order.DoesNotExist:
+        pass
+    try:
+        return await ArchivedOrder.objects.aget(order_number=order_number)
+    except ArchivedOrder.DoesNotExist:
+        raise Http404('No Order matches the given query.')
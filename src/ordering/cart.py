@@ -0,0 +1,135 @@
+"""
+Session cart for the ordering flow.
+
+The session only holds catalog ids and quantities, packed into one short
+string such as ``3.2.1.4-7.2;5.1..1`` (drink.size.flavor.toppings.quantity
+per line). Names and prices are resolved from the menu catalog and the
+pricing engine when the cart is shown or placed.
+"""
+
+from decimal import Decimal
+
+from .catalog import get_menu
+from .pricing import pricing_engine, PricingError
+
+
+SESSION_KEY = 'cart'
+PAYMENT_METHOD_KEY = 'payment_method'
+MAX_QUANTITY = 99
+
+
+def encode_lines(lines):
+    return ';'.join(
+        f'{drink_id}.{size_id}.{flavor_id or ""}.{"-".join(map(str, topping_ids))}.{quantity}'
+        for drink_id, size_id, flavor_id, topping_ids, quantity in lines
+    )
+
+
+def decode_lines(value):
+    lines = []
+    for chunk in filter(None, (value or '').split(';')):
+        try:
+            drink_id, size_id, flavor_id, topping_ids, quantity = chunk.split('.')
+            lines.append((
+                int(drink_id),
+                int(size_id),
+                int(flavor_id) if flavor_id else None,
+                tuple(int(topping_id) for topping_id in topping_ids.split('-') if topping_id),
+                int(quantity),
+            ))
+        except ValueError:
+            continue
+    return lines
+
+
+def line_key(drink_id, size_id, flavor_id=None, topping_ids=()):
+    return (int(drink_id), int(size_id), int(flavor_id) if flavor_id else None, tuple(sorted(map(int, topping_ids))))
+
+
+class Cart:
+
+    def __init__(self, session):
+        self.session = session
+        self.lines = decode_lines(session.get(SESSION_KEY))
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    @property
+    def payment_method(self):
+        return self.session.get(PAYMENT_METHOD_KEY)
+
+    def set_payment_method(self, payment_method):
+        if self.session.get(PAYMENT_METHOD_KEY) != payment_method:
+            self.session[PAYMENT_METHOD_KEY] = payment_method
+
+    def quantity(self, drink_id, size_id, flavor_id=None, topping_ids=()):
+        key = line_key(drink_id, size_id, flavor_id, topping_ids)
+        return next((line[4] for line in self.lines if line[:4] == key), 0)
+
+    def add(self, drink_id, size_id, flavor_id=None, topping_ids=(), quantity=1):
+        key = line_key(drink_id, size_id, flavor_id, topping_ids)
+        for index, line in enumerate(self.lines):
+            if line[:4] == key:
+                self.lines[index] = key + (min(line[4] + quantity, MAX_QUANTITY),)
+                break
+        else:
+            self.lines.append(key + (min(quantity, MAX_QUANTITY),))
+        self.save()
+
+    def remove(self, index):
+        if 0 <= index < len(self.lines):
+            del self.lines[index]
+            self.save()
+
+    def clear(self):
+        self.lines = []
+        self.session.pop(SESSION_KEY, None)
+        self.session.pop(PAYMENT_METHOD_KEY, None)
+
+    def save(self):
+        encoded = encode_lines(self.lines)
+        if self.session.get(SESSION_KEY) != encoded:
+            self.session[SESSION_KEY] = encoded
+
+    def order_items(self):
+        return [
+            {
+                'drink_id': drink_id,
+                'size_id': size_id,
+                'flavor_id': flavor_id,
+                'topping_ids': list(topping_ids),
+                'quantity': quantity,
+            }
+            for drink_id, size_id, flavor_id, topping_ids, quantity in self.lines
+        ]
+
+    def resolve(self):
+
+        menu = get_menu()
+        table = pricing_engine.table()
+        items = []
+        valid_lines = []
+        for line, item in zip(self.lines, self.order_items()):
+            try:
+                item['item_price'] = table.price_item(
+                    item['drink_id'], item['size_id'], item['flavor_id'], item['topping_ids'], item['quantity'],
+                )
+            except PricingError:
+                continue
+            flavor = menu.flavors_by_id.get(item['flavor_id'])
+            item['drink_name'] = menu.drinks_by_id[item['drink_id']].name
+            item['size_name'] = menu.sizes_by_id[item['size_id']].name
+            item['flavor_name'] = flavor.name if flavor else None
+            item['toppings'] = [{'id': topping_id, 'name': menu.toppings_by_id[topping_id].name} for topping_id in item['topping_ids']]
+            items.append(item)
+            valid_lines.append(line)
+
+        if len(valid_lines) != len(self.lines):
+            self.lines = valid_lines
+            self.save()
+
+        return items, sum((item['item_price'] for item in items), Decimal('0.00'))
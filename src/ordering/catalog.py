@@ -0,0 +1,151 @@
+"""
+In-process menu catalog shared by the ordering views.
+
+The four catalog tables are loaded together into an immutable snapshot that
+is kept in process memory. A version counter in the shared cache backend is
+bumped whenever a catalog row changes, so every worker notices and reloads.
+"""
+
+import threading
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import cached_property
+
+from .models import Drink, Flavor, Topping, Size
+
+
+VERSION_KEY = 'ordering:catalog:version'
+SNAPSHOT_KEY = 'ordering:catalog:snapshot:{}'
+
+
+@dataclass(frozen=True)
+class MenuSnapshot:
+
+    version: int
+    drinks: tuple
+    flavors: tuple
+    toppings: tuple
+    sizes: tuple
+
+    @cached_property
+    def available_drinks(self):
+        return tuple(drink for drink in self.drinks if drink.is_available)
+
+    @cached_property
+    def drinks_by_id(self):
+        return {drink.id: drink for drink in self.drinks}
+
+    @cached_property
+    def flavors_by_id(self):
+        return {flavor.id: flavor for flavor in self.flavors}
+
+    @cached_property
+    def toppings_by_id(self):
+        return {topping.id: topping for topping in self.toppings}
+
+    @cached_property
+    def sizes_by_id(self):
+        return {size.id: size for size in self.sizes}
+
+    def menu_context(self):
+        return {
+            'drinks': self.available_drinks,
+            'flavors': self.flavors,
+            'toppings': self.toppings,
+            'sizes': self.sizes,
+        }
+
+
+class MenuCatalog:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    def current_version(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, 1, timeout=None)
+            version = cache.get(VERSION_KEY, 1)
+        return version
+
+    async def acurrent_version(self):
+        version = await cache.aget(VERSION_KEY)
+        if version is None:
+            return await sync_to_async(self.current_version)()
+        return version
+
+    async def aget(self):
+        version = await self.acurrent_version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            self.hits += 1
+            return snapshot
+        return await sync_to_async(self.get)()
+
+    def get(self):
+        version = self.current_version()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            self.hits += 1
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                self.hits += 1
+                return snapshot
+
+            self.misses += 1
+            snapshot = cache.get(SNAPSHOT_KEY.format(version))
+            if snapshot is None:
+                snapshot = self._load(version)
+                cache.set(SNAPSHOT_KEY.format(version), snapshot, timeout=None)
+            self._snapshot = snapshot
+            return snapshot
+
+    def _load(self, version):
+        self.loads += 1
+        return MenuSnapshot(
+            version=version,
+            drinks=tuple(Drink.objects.order_by('pk')),
+            flavors=tuple(Flavor.objects.order_by('pk')),
+            toppings=tuple(Topping.objects.order_by('pk')),
+            sizes=tuple(Size.objects.order_by('pk')),
+        )
+
+    def invalidate(self):
+        old_version = self.current_version()
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, old_version + 1, timeout=None)
+        cache.delete(SNAPSHOT_KEY.format(old_version))
+
+    def stats(self):
+        return {
+            'version': self.current_version(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'loads': self.loads,
+        }
+
+
+menu_catalog = MenuCatalog()
+
+
+def get_menu():
+    return menu_catalog.get()
+
+
+def invalidate_menu(sender=None, **kwargs):
+    transaction.on_commit(menu_catalog.invalidate)
+
+
+CATALOG_MODELS = (Drink, Flavor, Topping, Size)
@@ -0,0 +1,82 @@
+"""
+Menu fragments rendered once per catalog version.
+
+The drink grids on the menu pages only depend on the catalog, so they are
+rendered once per catalog version. The markup is stored in the shared cache
+under that version and kept in process memory as well. The only per-request
+part, the CSRF input on each drink form, is left as a placeholder. It is
+filled in when the page is served, so a request costs a string join instead
+of a template render over every drink, size, flavor and topping.
+"""
+
+import threading
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.template.backends.utils import csrf_input
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+
+from .pricing import pricing_engine
+
+
+FRAGMENT_KEY = 'ordering:fragment:{}:{}'
+FRAGMENT_TIMEOUT = 24 * 60 * 60
+
+CSRF_PLACEHOLDER = mark_safe('<!--csrf-input-->')
+
+FRAGMENTS = {
+    'browse_menu_grid': 'ordering/fragments/browse_menu_grid.html',
+    'choose_specifics_grid': 'ordering/fragments/choose_specifics_grid.html',
+}
+
+
+class MenuFragments:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._parts = {}
+        self.renders = 0
+
+    def source(self, name, menu):
+        key = FRAGMENT_KEY.format(name, menu.version)
+        source = cache.get(key)
+        if source is None:
+            context = dict(
+                menu.menu_context(),
+                csrf_input=CSRF_PLACEHOLDER,
+                price_table_url=reverse('price_table', args=[pricing_engine.table().digest]),
+            )
+            source = render_to_string(FRAGMENTS[name], context)
+            self.renders += 1
+            cache.set(key, source, timeout=FRAGMENT_TIMEOUT)
+        return source
+
+    def _load(self, name, menu):
+        parts = tuple(self.source(name, menu).split(CSRF_PLACEHOLDER))
+        with self._lock:
+            self._parts[name] = (menu.version, parts)
+        return parts
+
+    def _cached_parts(self, name, menu):
+        entry = self._parts.get(name)
+        if entry is not None and entry[0] == menu.version:
+            return entry[1]
+        return None
+
+    def _join(self, parts, request):
+        if len(parts) == 1:
+            return mark_safe(parts[0])
+        return mark_safe(csrf_input(request).join(parts))
+
+    def render(self, name, menu, request):
+        parts = self._cached_parts(name, menu) or self._load(name, menu)
+        return self._join(parts, request)
+
+    async def arender(self, name, menu, request):
+        parts = self._cached_parts(name, menu) or await sync_to_async(self._load)(name, menu)
+        return self._join(parts, request)
+
+
+menu_fragments = MenuFragments()
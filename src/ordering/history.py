@@ -0,0 +1,243 @@
+"""
+Order history with keyset pagination.
+
+Orders are returned newest first, ordered by ``(created_at, source, id)``.
+``source`` puts live orders after archived ones that share a timestamp.
+A page cursor is the key of the last order on the page, so the next page
+is an index range scan that starts where the previous one stopped,
+however deep into the history it is.
+
+A page reads live orders with their payment, items and toppings, and
+archived orders separately, then merges the two newest-first. That is
+four queries whatever the page size or position. Only completed orders
+are archived, so a ``completed`` filter is dropped for the archive and
+any other status skips the archive query instead of walking the whole
+archive to find nothing. The NDJSON export walks the same pages, so a
+full day's dump holds one page in memory at a time.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from asgiref.sync import sync_to_async
+from django.db.models import Prefetch, Q
+
+from .analytics import day_bounds
+from .models import Order, OrderItem, Payment, ArchivedOrder
+
+
+ARCHIVE, LIVE = 0, 1
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+EXPORT_CHUNK = 500
+
+STATUSES = {status for status, _ in Order.STATUS_CHOICES}
+PAYMENT_METHODS = {method for method, _ in Payment.PAYMENT_METHOD_CHOICES}
+
+
+class HistoryError(ValueError):
+    pass
+
+
+def parse_filters(params):
+    filters = {}
+    status = params.get('status')
+    if status:
+        if status not in STATUSES:
+            raise HistoryError(f'Unknown status: {status}')
+        filters['status'] = status
+
+    payment_method = params.get('payment_method')
+    if payment_method:
+        if payment_method not in PAYMENT_METHODS:
+            raise HistoryError(f'Unknown payment method: {payment_method}')
+        filters['payment_method'] = payment_method
+
+    for name, bound in (('start', 0), ('end', 1)):
+        value = params.get(name)
+        if value:
+            try:
+                filters[name] = day_bounds(date.fromisoformat(value))[bound]
+            except ValueError:
+                raise HistoryError(f'{name} must be a date (YYYY-MM-DD).')
+    return filters
+
+
+def parse_limit(value):
+    if not value:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise HistoryError('limit must be an integer.')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def encode_cursor(key):
+    created_at, source, pk = key
+    raw = json.dumps([created_at.isoformat(), source, pk], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        created_at, source, pk = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(source), int(pk)
+    except (binascii.Error, ValueError, TypeError):
+        raise HistoryError('Invalid cursor.')
+
+
+def _after(cursor, source):
+    created_at, cursor_source, pk = cursor
+    if source < cursor_source:
+        return Q(created_at__lte=created_at)
+    if source > cursor_source:
+        return Q(created_at__lt=created_at)
+    return Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(pk__lt=pk))
+
+
+def _filter(queryset, filters, payment_method_field):
+    if 'status' in filters:
+        queryset = queryset.filter(status=filters['status'])
+    if 'payment_method' in filters:
+        queryset = queryset.filter(**{payment_method_field: filters['payment_method']})
+    if 'start' in filters:
+        queryset = queryset.filter(created_at__gte=filters['start'])
+    if 'end' in filters:
+        queryset = queryset.filter(created_at__lt=filters['end'])
+    return queryset
+
+
+def live_orders(filters, cursor=None):
+    items = OrderItem.objects.select_related('drink', 'size', 'flavor').prefetch_related('toppings')
+    queryset = _filter(
+        Order.objects.select_related('payment').prefetch_related(Prefetch('items', queryset=items)),
+        filters, 'payment__payment_method',
+    )
+    if cursor is not None:
+        queryset = queryset.filter(_after(cursor, LIVE))
+    return queryset.order_by('-created_at', '-pk')
+
+
+def archived_orders(filters, cursor=None):
+    if filters.get('status', 'completed') != 'completed':
+        return ArchivedOrder.objects.none()
+    filters = {name: value for name, value in filters.items() if name != 'status'}
+    queryset = _filter(ArchivedOrder.objects.all(), filters, 'payment_method')
+    if cursor is not None:
+        queryset = queryset.filter(_after(cursor, ARCHIVE))
+    return queryset.order_by('-created_at', '-pk')
+
+
+def _reference(pk, name):
+    return {'id': pk, 'name': name}
+
+
+def serialize_order(order):
+    try:
+        payment = order.payment
+    except Payment.DoesNotExist:
+        payment = None
+
+    return {
+        'order_number': order.order_number,
+        'status': order.status,
+        'total_amount': str(order.total_amount),
+        'created_at': order.created_at.isoformat(),
+        'updated_at': order.updated_at.isoformat(),
+        'archived': False,
+        'items': [
+            {
+                'drink': _reference(item.drink_id, item.drink.name),
+                'size': _reference(item.size_id, item.size.name),
+                'flavor': _reference(item.flavor_id, item.flavor.name) if item.flavor_id else None,
+                'toppings': [_reference(topping.id, topping.name) for topping in item.toppings.all()],
+                'quantity': item.quantity,
+                'item_price': str(item.item_price),
+            }
+            for item in order.items.all()
+        ],
+        'payment': {
+            'method': payment.payment_method,
+            'status': payment.status,
+            'amount': str(payment.amount),
+            'transaction_id': payment.transaction_id,
+            'created_at': payment.created_at.isoformat(),
+        } if payment else None,
+    }
+
+
+def serialize_archived(order):
+    return {
+        'order_number': order.order_number,
+        'status': order.status,
+        'total_amount': str(order.total_amount),
+        'created_at': order.created_at.isoformat(),
+        'updated_at': order.updated_at.isoformat(),
+        'archived': True,
+        'items': [
+            {
+                'drink': _reference(*item['drink']),
+                'size': _reference(*item['size']),
+                'flavor': _reference(*item['flavor']) if item['flavor'] else None,
+                'toppings': [_reference(*topping) for topping in item['toppings']],
+                'quantity': item['quantity'],
+                'item_price': item['item_price'],
+            }
+            for item in order.line_items
+        ],
+        'payment': {
+            'method': order.payment_method,
+            'status': order.payment_status,
+            'amount': str(order.payment_amount),
+            'transaction_id': order.transaction_id,
+            'created_at': order.paid_at.isoformat() if order.paid_at else None,
+        } if order.payment_method else None,
+    }
+
+
+def history_page(filters, cursor=None, limit=DEFAULT_LIMIT):
+    """Return up to ``limit`` serialized orders after ``cursor`` and the cursor of the next page."""
+
+    rows = [
+        ((order.created_at, LIVE, order.pk), serialize_order, order)
+        for order in live_orders(filters, cursor)[:limit + 1]
+    ] + [
+        ((order.created_at, ARCHIVE, order.pk), serialize_archived, order)
+        for order in archived_orders(filters, cursor)[:limit + 1]
+    ]
+    rows.sort(key=lambda row: row[0], reverse=True)
+
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1][0]) if len(rows) > limit else None
+    return [serialize(order) for _, serialize, order in page], next_cursor
+
+
+def _ndjson(orders):
+    return ''.join(json.dumps(order, separators=(',', ':')) + '\n' for order in orders)
+
+
+def iter_ndjson(filters, cursor=None, chunk_size=EXPORT_CHUNK):
+    while True:
+        orders, cursor = history_page(filters, cursor, chunk_size)
+        if orders:
+            yield _ndjson(orders)
+        if cursor is None:
+            return
+        cursor = decode_cursor(cursor)
+
+
+async def aiter_ndjson(filters, cursor=None, chunk_size=EXPORT_CHUNK):
+    while True:
+        orders, cursor = await sync_to_async(history_page)(filters, cursor, chunk_size)
+        if orders:
+            yield _ndjson(orders)
+        if cursor is None:
+            return
+        cursor = decode_cursor(cursor)
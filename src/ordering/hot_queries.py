@@ -0,0 +1,137 @@
+"""
+Registry of the hot request paths of the ordering views and the admin.
+
+Each entry is a label and a function that drives the real code path:
+a request through the test client logged in as staff, or the function a
+view delegates to when the view would answer from memory. The function
+gets the client and a ``sample`` dict naming seeded rows to act on.
+``manage.py check_query_plans`` captures the SQL every entry issues,
+explains each statement and fails if SQLite would answer one with a full
+table scan.
+
+Scans of the menu tables in ``SMALL_TABLES`` are fine. So is a single
+walk along an index in the order the page asks for, which the ``LIMIT``
+stops once the page is full, unless it filters on a column outside
+``WALK_FILTERS``. Those columns have so few values that a filtered walk
+reads a small multiple of the page.
+"""
+
+import json
+
+HOT_QUERIES = []
+
+SMALL_TABLES = {'ordering_drink', 'ordering_size', 'ordering_flavor', 'ordering_topping'}
+
+WALK_FILTERS = {('ordering_payment', 'payment_method'), ('ordering_archivedorder', 'payment_method')}
+
+
+def hot_query(label):
+    def register(func):
+        HOT_QUERIES.append((label, func))
+        return func
+    return register
+
+
+def _post_json(client, path, data):
+    return client.post(path, json.dumps(data), content_type='application/json')
+
+
+@hot_query('views.place_order')
+def place_order(client, sample):
+    client.post('/choose-specifics/', {
+        'drink_id': sample['drink_id'], 'size_id': sample['size_id'], 'flavor_id': sample['flavor_id'],
+        'toppings': sample['topping_ids'], 'quantity': 2,
+    })
+    client.post('/payment-method/', {'payment_method': 'cash'})
+    client.get('/counter/')
+    return client.post('/place-order/', {'idempotency_key': 'query-plan-check'})
+
+
+@hot_query('views.wait_for_drink')
+def wait_for_drink(client, sample):
+    return client.get(f'/wait/{sample["order_number"]}/')
+
+
+@hot_query('views.wait_for_archived_drink')
+def wait_for_archived_drink(client, sample):
+    return client.get(f'/wait/{sample["archived_order_number"]}/')
+
+
+@hot_query('views.receive_drink')
+def receive_drink(client, sample):
+    client.get(f'/receive/{sample["order_number"]}/')
+    return client.post(f'/receive/{sample["order_number"]}/')
+
+
+@hot_query('views.order_status')
+def order_status(client, sample):
+    return client.get(f'/api/order-status/{sample["order_number"]}/')
+
+
+@hot_query('views.update_order_status')
+def update_order_status(client, sample):
+    return _post_json(client, f'/api/update-status/{sample["order_number"]}/', {'status': 'preparing'})
+
+
+@hot_query('views.update_order_statuses')
+def update_order_statuses(client, sample):
+    return _post_json(client, '/api/update-status/', {'updates': [
+        {'order_number': sample['order_number'], 'status': 'ready'},
+        {'order_number': sample['other_order_number'], 'status': 'preparing'},
+    ]})
+
+
+@hot_query('views.sales_dashboard')
+def sales_dashboard(client, sample):
+    return client.get('/sales/')
+
+
+@hot_query('views.order_history')
+def order_history(client, sample):
+    page = client.get('/api/orders/?limit=1').json()
+    client.get(f'/api/orders/?limit=1&cursor={page["next_cursor"]}')
+    client.get('/api/orders/?status=placed')
+    return client.get('/api/orders/?status=completed&payment_method=cash')
+
+
+@hot_query('views.order_history_export')
+def order_history_export(client, sample):
+    response = client.get('/api/orders/?format=ndjson')
+    b''.join(response.streaming_content)
+    return response
+
+
+@hot_query('kitchen.active_orders')
+def kitchen_active_orders(client, sample):
+    from .kitchen import ActiveOrdersIndex
+    return ActiveOrdersIndex().orders()
+
+
+@hot_query('wait_times.estimate')
+def wait_times_estimate(client, sample):
+    from .wait_times import WaitTimeEstimator
+    return WaitTimeEstimator().estimate(sample['order_number'])
+
+
+ADMIN_PAGES = [
+    ('orders', '/admin/ordering/order/'),
+    ('orders_by_status', '/admin/ordering/order/?status__exact=placed'),
+    ('orders_by_date', '/admin/ordering/order/?created=today'),
+    ('orders_by_order_number', '/admin/ordering/order/?q={order_number}'),
+    ('order_change', '/admin/ordering/order/{order_id}/change/'),
+    ('payments', '/admin/ordering/payment/'),
+    ('payments_by_status', '/admin/ordering/payment/?status__exact=completed&o=-1'),
+    ('payments_by_method', '/admin/ordering/payment/?payment_method__exact=cash&created=week'),
+    ('payments_by_order_number', '/admin/ordering/payment/?q={order_number}'),
+    ('payment_change', '/admin/ordering/payment/{payment_id}/change/'),
+    ('archived_orders', '/admin/ordering/archivedorder/'),
+    ('archived_orders_by_order_number', '/admin/ordering/archivedorder/?q={archived_order_number}'),
+]
+
+
+def _admin_page(path):
+    return lambda client, sample: client.get(path.format(**sample))
+
+
+for label, path in ADMIN_PAGES:
+    hot_query(f'admin.{label}')(_admin_page(path))
@@ -0,0 +1,147 @@
+"""
+Active-orders index behind the kitchen queue.
+
+The index is loaded once with a fixed number of queries and then kept up
+to date incrementally as orders change status in this process. Every
+transition also bumps a generation counter in the shared cache. If another
+process moved an order, the counters no longer line up and the next read
+reloads the index from the database.
+
+This only holds if ``cache.incr`` is atomic across processes, so that no
+two transitions get the same generation. Memcached, Redis and the
+locking file cache in ``milk_tea_system.filecache`` qualify; Django's
+own file and database caches do not.
+"""
+
+import bisect
+import threading
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+from .models import Order, OrderItem
+
+
+ACTIVE_STATUSES = ['placed', 'preparing', 'ready']
+
+GENERATION_KEY = 'ordering:kitchen:generation'
+
+
+def active_orders_queryset():
+    items = OrderItem.objects.select_related('drink', 'size', 'flavor').prefetch_related('toppings')
+    return (
+        Order.objects.filter(status__in=ACTIVE_STATUSES)
+        .order_by('created_at', 'id')
+        .prefetch_related(Prefetch('items', queryset=items))
+    )
+
+
+def serialize_order(order):
+    return {
+        'order_number': order.order_number,
+        'status': order.status,
+        'created_at': order.created_at.isoformat(),
+        'total_amount': str(order.total_amount),
+        'items': [
+            {
+                'drink': item.drink.name,
+                'drink_id': item.drink_id,
+                'size': item.size.name,
+                'size_id': item.size_id,
+                'flavor': item.flavor.name if item.flavor else None,
+                'toppings': [topping.name for topping in item.toppings.all()],
+                'quantity': item.quantity,
+            }
+            for item in order.items.all()
+        ],
+    }
+
+
+class ActiveOrdersIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = None
+        self._keys = []
+        self._pending = set()
+        self._generation = None
+
+    def _current_generation(self):
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            cache.add(GENERATION_KEY, 0, timeout=None)
+            generation = cache.get(GENERATION_KEY, 0)
+        return generation
+
+    def _bump_generation(self):
+        try:
+            return cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.add(GENERATION_KEY, 1, timeout=None)
+            return cache.get(GENERATION_KEY, 1)
+
+    def _insert(self, order):
+        key = (order.created_at, order.id, order.order_number)
+        self._entries[order.order_number] = (key, serialize_order(order))
+        bisect.insort(self._keys, key)
+
+    def _remove(self, order_number):
+        entry = self._entries.pop(order_number, None)
+        if entry is not None:
+            index = bisect.bisect_left(self._keys, entry[0])
+            del self._keys[index]
+
+    def _reload(self, generation):
+        self._entries = {}
+        self._keys = []
+        self._pending = set()
+        for order in active_orders_queryset():
+            self._insert(order)
+        self._generation = generation
+
+    def _load_pending(self):
+        pending = list(self._pending)
+        self._pending = set()
+        for order_number in pending:
+            self._remove(order_number)
+        for order in active_orders_queryset().filter(order_number__in=pending):
+            self._insert(order)
+
+    def orders(self):
+        generation = self._current_generation()
+        with self._lock:
+            if self._entries is None or generation != self._generation:
+                self._reload(generation)
+            elif self._pending:
+                self._load_pending()
+            return [dict(self._entries[key[2]][1]) for key in self._keys]
+
+    def transition(self, order_number, status):
+        generation = self._bump_generation()
+        with self._lock:
+            if self._entries is None:
+                return
+            if self._generation is None or generation != self._generation + 1:
+                self._entries = None
+                return
+            self._generation = generation
+
+            if status not in ACTIVE_STATUSES:
+                self._pending.discard(order_number)
+                self._remove(order_number)
+            elif order_number in self._entries:
+                self._entries[order_number][1]['status'] = status
+            else:
+                self._pending.add(order_number)
+
+
+active_orders = ActiveOrdersIndex()
+
+
+def record_order_transition(sender, instance, **kwargs):
+    transaction.on_commit(lambda: active_orders.transition(instance.order_number, instance.status))
+
+
+def forget_order(sender, instance, **kwargs):
+    transaction.on_commit(lambda: active_orders.transition(instance.order_number, None))
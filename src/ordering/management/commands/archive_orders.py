@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ordering.archive import archivable, archive_orders
+from ordering.models import ArchivedOrder
+
+
+class Command(BaseCommand):
+    help = 'Move completed orders older than --days out of the live tables into the order archive.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Keep completed orders this many days in the live tables.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the orders that would be archived.')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1 so that only closed days are archived.')
+
+        if options['dry_run']:
+            count = archivable(timezone.now() - timedelta(days=options['days'])).count()
+            self.stdout.write(f'{count} completed order(s) older than {options["days"]} day(s) would be archived.')
+            return
+
+        start = time.perf_counter()
+        moved = 0
+        for batch in archive_orders(options['days'], batch_size=options['batch_size']):
+            moved += batch
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{moved} archived')
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {moved} order(s) in {elapsed:.1f}s; {ArchivedOrder.objects.count()} order(s) in the archive.'
+        ))
@@ -0,0 +1,170 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from ordering.archive import archive_orders, find_order
+from ordering.catalog import menu_catalog
+from ordering.kitchen import ACTIVE_STATUSES
+from ordering.models import Drink, Flavor, Topping, Size, Order, OrderItem, Payment, ArchivedOrder
+from ordering.views import _orders_with_items
+
+
+BATCH = 5000
+
+
+class Command(BaseCommand):
+    help = 'Measure live-table query latency as the order history grows, with the history archived or kept live.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--history', default='0,100000,1000000', help='Comma-separated total history sizes.')
+        parser.add_argument('--live', type=int, default=2000, help='Recent orders kept in the live tables.')
+        parser.add_argument('--mode', choices=['archived', 'live'], default='archived',
+                            help='Where the history is stored: the archive table, or the live tables as without archiving.')
+        parser.add_argument('--samples', type=int, default=500)
+        parser.add_argument('--archive-orders', type=int, default=10000,
+                            help='Old completed orders to move with archive_orders to measure throughput.')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['history'].split(','))
+        with transaction.atomic():
+            catalog = self._seed_catalog()
+            menu_catalog.invalidate()
+            live_numbers = self._seed_live(catalog, options['live'])
+
+            self.stdout.write(f'history stored in: {options["mode"]} tables, {options["live"]} live orders')
+            self.stdout.write(
+                f'{"history":>10} {"live lookup":>12} {"archive lookup":>15} {"kitchen queue":>14} '
+                f'{"today count":>12} {"live COUNT(*)":>14}'
+            )
+            seeded = 0
+            for size in sizes:
+                if options['mode'] == 'archived':
+                    self._seed_archive(seeded, size, catalog)
+                else:
+                    self._seed_history(seeded, size, catalog)
+                seeded = size
+                self._measure(size, live_numbers, options['samples'])
+
+            if options['mode'] == 'archived' and options['archive_orders']:
+                self._measure_archiving(catalog, options['archive_orders'])
+            transaction.set_rollback(True)
+        menu_catalog.invalidate()
+
+    def _seed_catalog(self):
+        drink = Drink.objects.create(name='Archive Bench Tea', base_price=Decimal('100.00'))
+        size = Size.objects.create(name='Archive Bench Size', price_multiplier=Decimal('1.25'))
+        flavor = Flavor.objects.create(name='Archive Bench Flavor', additional_price=Decimal('10.00'))
+        topping = Topping.objects.create(name='Archive Bench Topping', price=Decimal('15.00'))
+        return drink, size, flavor, topping
+
+    def _seed_orders(self, numbers, statuses, created_at, catalog):
+        drink, size, flavor, topping = catalog
+        orders = Order.objects.bulk_create([
+            Order(order_number=number, status=status, total_amount=Decimal('140.00'), created_at=created)
+            for number, status, created in zip(numbers, statuses, created_at)
+        ])
+        items = OrderItem.objects.bulk_create([
+            OrderItem(order=order, drink=drink, size=size, flavor=flavor, quantity=1, item_price=Decimal('140.00'))
+            for order in orders
+        ])
+        OrderItem.toppings.through.objects.bulk_create([
+            OrderItem.toppings.through(orderitem_id=item.id, topping_id=topping.id) for item in items
+        ])
+        Payment.objects.bulk_create([
+            Payment(order=order, payment_method='cash', amount=order.total_amount, status='completed', created_at=order.created_at)
+            for order in orders
+        ])
+
+    def _seed_live(self, catalog, count):
+        now = timezone.now()
+        statuses = ['placed', 'preparing', 'ready', 'completed']
+        numbers = [f'L{n:08d}' for n in range(count)]
+        for offset in range(0, count, BATCH):
+            batch = range(offset, min(offset + BATCH, count))
+            self._seed_orders(
+                [numbers[n] for n in batch], [statuses[n % len(statuses)] for n in batch],
+                [now - timedelta(seconds=n * 30) for n in batch], catalog,
+            )
+        return numbers
+
+    def _history_created_at(self, n):
+        return timezone.now() - timedelta(days=40, seconds=n * 13)
+
+    def _seed_history(self, start, end, catalog):
+        for offset in range(start, end, BATCH):
+            batch = range(offset, min(offset + BATCH, end))
+            self._seed_orders(
+                [f'H{n:09d}' for n in batch], ['completed'] * len(batch),
+                [self._history_created_at(n) for n in batch], catalog,
+            )
+
+    def _seed_archive(self, start, end, catalog):
+        drink, size, flavor, topping = catalog
+        line_items = [{
+            'quantity': 1, 'item_price': '140.00', 'drink': [drink.id, drink.name], 'size': [size.id, size.name],
+            'flavor': [flavor.id, flavor.name], 'toppings': [[topping.id, topping.name]],
+        }]
+        for offset in range(start, end, BATCH):
+            ArchivedOrder.objects.bulk_create([
+                ArchivedOrder(
+                    order_number=f'H{n:09d}', total_amount=Decimal('140.00'), created_at=self._history_created_at(n),
+                    updated_at=self._history_created_at(n), line_items=line_items, payment_method='cash',
+                    payment_status='completed', payment_amount=Decimal('140.00'), paid_at=self._history_created_at(n),
+                )
+                for n in range(offset, min(offset + BATCH, end))
+            ])
+
+    def _time(self, samples, operation):
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            operation()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000
+
+    def _measure(self, size, live_numbers, samples):
+        today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        def live_lookup():
+            order = find_order(random.choice(live_numbers), _orders_with_items())
+            list(order.items.all())
+
+        def archive_lookup():
+            order = find_order(f'H{random.randrange(size):09d}', _orders_with_items())
+            list(order.items.all())
+
+        def kitchen_queue():
+            list(Order.objects.filter(status__in=ACTIVE_STATUSES).order_by('created_at').values_list('order_number', 'status')[:50])
+
+        def today_count():
+            Order.objects.filter(created_at__gte=today).count()
+
+        def live_count():
+            Order.objects.count()
+
+        archived = f'{self._time(samples, archive_lookup):>12.3f} ms' if size else f'{"-":>15}'
+        self.stdout.write(
+            f'{size:>10} {self._time(samples, live_lookup):>9.3f} ms {archived} '
+            f'{self._time(samples, kitchen_queue):>11.3f} ms {self._time(samples, today_count):>9.3f} ms '
+            f'{self._time(max(samples // 50, 3), live_count):>11.3f} ms'
+        )
+
+    def _measure_archiving(self, catalog, count):
+        created = timezone.now() - timedelta(days=60)
+        for offset in range(0, count, BATCH):
+            batch = range(offset, min(offset + BATCH, count))
+            self._seed_orders(
+                [f'A{n:09d}' for n in batch], ['completed'] * len(batch),
+                [created + timedelta(seconds=n) for n in batch], catalog,
+            )
+
+        start = time.perf_counter()
+        moved = sum(archive_orders(days=30))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'archive_orders moved {moved} orders with items and payments in {elapsed:.2f}s ({moved / elapsed:.0f} orders/s)')
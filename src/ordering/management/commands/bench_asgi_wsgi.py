@@ -0,0 +1,160 @@
+import asyncio
+import io
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+
+from ordering.catalog import get_menu
+from ordering.models import Order, OrderItem
+from ordering.pricing import price_item
+
+
+def _wsgi_environ(path):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def _asgi_scope(path):
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare WSGI and ASGI throughput and memory for the read-heavy ordering views at high concurrency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=4000)
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--no-memory', action='store_true', help='Skip tracemalloc, which slows both runs down.')
+
+    def handle(self, *args, **options):
+        menu = get_menu()
+        if not menu.available_drinks or not menu.sizes:
+            raise CommandError('The menu needs at least one available drink and one size.')
+
+        drink_id, size_id = menu.available_drinks[0].id, menu.sizes[0].id
+        price = price_item(drink_id, size_id)
+        order = Order.objects.create(order_number=Order().generate_order_number(), status='placed', total_amount=price)
+        OrderItem.objects.create(order=order, drink_id=drink_id, size_id=size_id, item_price=price)
+        paths = [
+            '/menu/',
+            f'/wait/{order.order_number}/',
+            f'/api/order-status/{order.order_number}/',
+            f'/enjoy/{order.order_number}/',
+        ]
+        try:
+            for name, run in (('wsgi', self._run_wsgi), ('asgi', self._run_asgi)):
+                self._report(name, *self._measure(run, paths, options))
+        finally:
+            order.delete()
+
+    def _measure(self, run, paths, options):
+        count = options['requests']
+        requests = [paths[index % len(paths)] for index in range(count)]
+        memory = not options['no_memory']
+        if memory:
+            tracemalloc.start()
+            baseline, _ = tracemalloc.get_traced_memory()
+        threads_before = threading.active_count()
+
+        start = time.perf_counter()
+        statuses, peak_threads = run(requests, options['concurrency'])
+        elapsed = time.perf_counter() - start
+
+        peak = None
+        if memory:
+            _, peak = tracemalloc.get_traced_memory()
+            peak -= baseline
+            tracemalloc.stop()
+        errors = sum(status >= 400 for status in statuses)
+        return count, elapsed, errors, peak, peak_threads - threads_before
+
+    def _run_wsgi(self, requests, concurrency):
+        application = get_wsgi_application()
+        peak_threads = [threading.active_count()]
+
+        def call(path):
+            status = []
+            body = application(_wsgi_environ(path), lambda code, headers, exc_info=None: status.append(code))
+            try:
+                for _ in body:
+                    pass
+            finally:
+                body.close()
+            peak_threads[0] = max(peak_threads[0], threading.active_count())
+            return int(status[0].split()[0])
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            statuses = list(executor.map(call, requests))
+        return statuses, peak_threads[0]
+
+    def _run_asgi(self, requests, concurrency):
+        application = get_asgi_application()
+        peak_threads = [threading.active_count()]
+
+        async def call(path):
+            status = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            await application(_asgi_scope(path), receive, send)
+            peak_threads[0] = max(peak_threads[0], threading.active_count())
+            return status[0]
+
+        async def run():
+            queue = list(reversed(requests))
+            statuses = []
+
+            async def worker():
+                while queue:
+                    statuses.append(await call(queue.pop()))
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return statuses
+
+        return asyncio.run(run()), peak_threads[0]
+
+    def _report(self, name, count, elapsed, errors, peak, extra_threads):
+        self.stdout.write(f'{name}:')
+        self.stdout.write(f'  requests:         {count} ({errors} errors)')
+        self.stdout.write(f'  throughput:       {count / elapsed:.0f} req/s')
+        self.stdout.write(f'  extra threads:    {extra_threads}')
+        if peak is not None:
+            self.stdout.write(f'  peak memory:      {peak / 1024 / 1024:.1f} MiB')
@@ -0,0 +1,76 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.backends.utils import csrf_input
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from ordering.catalog import get_menu, menu_catalog
+from ordering.fragments import FRAGMENTS, menu_fragments
+from ordering.models import Drink, Flavor, Topping, Size
+
+
+PAGES = {
+    'browse_menu_grid': 'ordering/browse_menu.html',
+    'choose_specifics_grid': 'ordering/choose_specifics.html',
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request menu rendering against the per-version cached menu fragments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drinks', type=int, default=200)
+        parser.add_argument('--toppings', type=int, default=10)
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options['drinks'], options['toppings'])
+            menu_catalog.invalidate()
+            self._run(options['requests'])
+            transaction.set_rollback(True)
+        menu_catalog.invalidate()
+
+    def _seed(self, drink_count, topping_count):
+        Drink.objects.bulk_create([
+            Drink(name=f'Bench Drink {i}', description='A bench drink with a reasonably long description.', base_price=Decimal('95.00') + i)
+            for i in range(drink_count)
+        ])
+        Size.objects.bulk_create([Size(name=name, price_multiplier=Decimal(m)) for name, m in [('S', '1.00'), ('M', '1.25'), ('L', '1.50')]])
+        Flavor.objects.bulk_create([Flavor(name=f'Bench Flavor {i}', additional_price=Decimal('10.00')) for i in range(5)])
+        Topping.objects.bulk_create([Topping(name=f'Bench Topping {i}', price=Decimal('12.50')) for i in range(topping_count)])
+
+    def _run(self, count):
+        factory = RequestFactory()
+        menu = get_menu()
+        self.stdout.write(
+            f'menu: {len(menu.available_drinks)} drinks, {len(menu.sizes)} sizes, '
+            f'{len(menu.flavors)} flavors, {len(menu.toppings)} toppings'
+        )
+
+        for name, page in PAGES.items():
+            def full_render(request):
+                context = dict(menu.menu_context(), csrf_input=csrf_input(request))
+                grid = render_to_string(FRAGMENTS[name], context)
+                return render_to_string(page, {'drinks_grid': grid}, request)
+
+            def fragment_render(request):
+                grid = menu_fragments.render(name, menu, request)
+                return render_to_string(page, {'drinks_grid': grid}, request)
+
+            start = time.perf_counter()
+            fragment_render(factory.get('/'))
+            first = time.perf_counter() - start
+
+            for label, render in (('full render', full_render), ('cached fragment', fragment_render)):
+                start = time.perf_counter()
+                for _ in range(count):
+                    html = render(factory.get('/'))
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{page:<32} {label:<16} {elapsed / count * 1000:>8.2f} ms/request  ({len(html) / 1024:.0f} KiB)'
+                )
+            self.stdout.write(f'{page:<32} {"first render":<16} {first * 1000:>8.2f} ms (once per catalog version)')
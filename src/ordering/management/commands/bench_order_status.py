@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.test import RequestFactory
+
+from ordering.models import Order
+from ordering.status_cache import status_versions
+from ordering.views import get_order_status
+
+
+def legacy_get_order_status(request, order_number):
+
+    order = get_object_or_404(Order, order_number=order_number)
+    return JsonResponse({
+        'status': order.status,
+        'order_number': order.order_number,
+        'total_amount': str(order.total_amount)
+    })
+
+
+class Command(BaseCommand):
+    help = 'Measure order-status polls per second with and without conditional GETs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            order = Order.objects.create(order_number=Order().generate_order_number(), status='preparing')
+            status_versions.store(order)
+            self._run(order.order_number, options['requests'])
+            transaction.set_rollback(True)
+        status_versions.forget(order.order_number)
+
+    def _measure(self, view, request, order_number, count):
+        if asyncio.iscoroutinefunction(view):
+            return async_to_sync(self._ameasure)(view, request, order_number, count)
+        start = time.perf_counter()
+        for _ in range(count):
+            response = view(request, order_number)
+        elapsed = time.perf_counter() - start
+        return count / elapsed, response.status_code
+
+    async def _ameasure(self, view, request, order_number, count):
+        start = time.perf_counter()
+        for _ in range(count):
+            response = await view(request, order_number)
+        elapsed = time.perf_counter() - start
+        return count / elapsed, response.status_code
+
+    def _run(self, order_number, count):
+        factory = RequestFactory()
+        path = f'/api/order-status/{order_number}/'
+        plain = factory.get(path)
+        etag = async_to_sync(get_order_status)(plain, order_number)['ETag']
+        conditional = factory.get(path, HTTP_IF_NONE_MATCH=etag)
+
+        for label, view, request in [
+            ('before', legacy_get_order_status, plain),
+            ('after (200)', get_order_status, plain),
+            ('after (304)', get_order_status, conditional),
+        ]:
+            rate, status_code = self._measure(view, request, order_number, count)
+            self.stdout.write(f'{label:<12} {rate:>10.0f} req/s  [{status_code}]')
@@ -0,0 +1,86 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from ordering.models import Drink, Flavor, Topping, Size, Order, OrderItem
+from ordering.catalog import menu_catalog
+from ordering.pricing import pricing_engine
+
+
+def legacy_calculate_price(item):
+
+    base_price = item.drink.base_price * item.size.price_multiplier
+    if item.flavor:
+        base_price += item.flavor.additional_price
+
+    toppings_price = sum(topping.price for topping in item.toppings.all())
+    return (base_price + toppings_price) * item.quantity
+
+
+class Command(BaseCommand):
+    help = 'Compare the precompiled pricing engine against the per-item ORM pricing path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=500)
+        parser.add_argument('--toppings', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            items = self._seed(options['items'], options['toppings'])
+            menu_catalog.invalidate()
+            self._run(items)
+            transaction.set_rollback(True)
+        menu_catalog.invalidate()
+
+    def _seed(self, count, topping_count):
+        drinks = [Drink.objects.create(name=f'Bench Drink {i}', base_price=Decimal('95.00') + i) for i in range(10)]
+        sizes = [Size.objects.create(name=name, price_multiplier=Decimal(m)) for name, m in [('S', '1.00'), ('M', '1.25'), ('L', '1.50')]]
+        flavor = Flavor.objects.create(name='Bench Flavor', additional_price=Decimal('10.00'))
+        toppings = [Topping.objects.create(name=f'Bench Topping {i}', price=Decimal('12.50')) for i in range(topping_count)]
+        order = Order.objects.create(order_number='BENCH-PRICING')
+
+        items = []
+        for i in range(count):
+            item = OrderItem.objects.create(
+                order=order,
+                drink=drinks[i % len(drinks)],
+                size=sizes[i % len(sizes)],
+                flavor=flavor,
+                quantity=1 + i % 3,
+                item_price=Decimal('1.00'),
+            )
+            item.toppings.set(toppings)
+            items.append(item)
+        return [OrderItem.objects.get(pk=item.pk) for item in items]
+
+    def _run(self, items):
+        with CaptureQueriesContext(connection) as legacy_queries:
+            start = time.perf_counter()
+            legacy_total = sum(legacy_calculate_price(item) for item in items)
+            legacy_elapsed = time.perf_counter() - start
+
+        for item in items:
+            item.topping_ids = list(item.toppings.values_list('pk', flat=True))
+        cart = [
+            {
+                'drink_id': item.drink_id,
+                'size_id': item.size_id,
+                'flavor_id': item.flavor_id,
+                'topping_ids': item.topping_ids,
+                'quantity': item.quantity,
+            }
+            for item in items
+        ]
+        pricing_engine.table()
+
+        with CaptureQueriesContext(connection) as engine_queries:
+            start = time.perf_counter()
+            _, engine_total = pricing_engine.price_cart(cart)
+            engine_elapsed = time.perf_counter() - start
+
+        self.stdout.write(f'items:  {len(items)}')
+        self.stdout.write(f'legacy: {legacy_elapsed * 1000:.2f} ms, {len(legacy_queries)} queries, total {legacy_total:.2f}')
+        self.stdout.write(f'engine: {engine_elapsed * 1000:.2f} ms, {len(engine_queries)} queries, total {engine_total:.2f}')
@@ -0,0 +1,109 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from ordering.analytics import day_bounds, rollup_day, summarize
+from ordering.models import Drink, Topping, Size, Order, OrderItem, Payment
+
+
+def raw_summary(start, end):
+
+    items = OrderItem.objects.filter(order__created_at__gte=start, order__created_at__lt=end).exclude(order__status='pending')
+    through = OrderItem.toppings.through.objects.filter(
+        orderitem__order__created_at__gte=start, orderitem__order__created_at__lt=end,
+    ).exclude(orderitem__order__status='pending')
+    payments = Payment.objects.filter(order__created_at__gte=start, order__created_at__lt=end).exclude(order__status='pending')
+    return {
+        'drink': list(items.values('drink_id').annotate(quantity=Sum('quantity'), revenue=Sum('item_price')).order_by()),
+        'size': list(items.values('size_id').annotate(quantity=Sum('quantity'), revenue=Sum('item_price')).order_by()),
+        'topping': list(through.values('topping_id').annotate(
+            quantity=Sum('orderitem__quantity'), revenue=Sum(F('topping__price') * F('orderitem__quantity')),
+        ).order_by()),
+        'payment_method': list(payments.values('payment_method').annotate(quantity=Count('id'), revenue=Sum('amount')).order_by()),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare range reports from sales rollups against raw order tables on a generated dataset.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1000000, help='Order items to generate.')
+        parser.add_argument('--days', type=int, default=90, help='Days of history to spread them over.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._run(options)
+            transaction.set_rollback(True)
+
+    def _timed(self, label, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.stdout.write(f'{label:<28} {time.perf_counter() - start:>9.3f} s')
+        return result
+
+    def _run(self, options):
+        today = timezone.localdate()
+        first_day = today - timedelta(days=options['days'])
+        self._timed('generate dataset', self._generate, options['items'], options['days'], options['batch_size'])
+        self._timed('rollup closed days', lambda: [rollup_day(first_day + timedelta(days=n)) for n in range(options['days'])])
+
+        for label, span in [('1 day', 1), ('7 days', 7), (f'{options["days"]} days', options['days'])]:
+            start_day = today - timedelta(days=span)
+            end_day = today - timedelta(days=1)
+            self._timed(f'raw report ({label})', raw_summary, *self._bounds(start_day, end_day))
+            self._timed(f'rollup report ({label})', summarize, start_day, end_day)
+
+    def _bounds(self, start_day, end_day):
+        return day_bounds(start_day)[0], day_bounds(end_day)[1]
+
+    def _generate(self, item_count, days, batch_size):
+        rng = random.Random(42)
+        drinks = [Drink.objects.create(name=f'Bench Drink {i}', base_price=Decimal('90.00') + i) for i in range(20)]
+        sizes = [Size.objects.create(name=name, price_multiplier=Decimal(m)) for name, m in [('S', '1.00'), ('M', '1.25'), ('L', '1.50')]]
+        toppings = [Topping.objects.create(name=f'Bench Topping {i}', price=Decimal('10.00') + i) for i in range(8)]
+        through = OrderItem.toppings.through
+        start = timezone.now() - timedelta(days=days)
+        span = days * 24 * 3600
+
+        order_count = item_count // 2
+        for offset in range(0, order_count, batch_size):
+            orders = Order.objects.bulk_create([
+                Order(
+                    order_number=f'BENCH-{offset + n}',
+                    status='completed',
+                    total_amount=Decimal('250.00'),
+                    created_at=start + timedelta(seconds=rng.randrange(span)),
+                )
+                for n in range(min(batch_size, order_count - offset))
+            ])
+            items = OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    drink=rng.choice(drinks),
+                    size=rng.choice(sizes),
+                    quantity=rng.randint(1, 3),
+                    item_price=Decimal('125.00'),
+                )
+                for order in orders
+                for _ in range(2)
+            ])
+            through.objects.bulk_create([
+                through(orderitem_id=item.pk, topping_id=rng.choice(toppings).pk) for item in items
+            ])
+            Payment.objects.bulk_create([
+                Payment(
+                    order=order,
+                    payment_method=rng.choice(['cash', 'credit_card']),
+                    amount=order.total_amount,
+                    status='completed',
+                    created_at=order.created_at,
+                )
+                for order in orders
+            ])
@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import Counter
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, OperationalError
+
+from ordering.catalog import menu_catalog
+from ordering.models import Drink, Size
+from ordering.orders import create_order
+
+
+BASELINE = {
+    'CONN_MAX_AGE': 0,
+    'CONN_HEALTH_CHECKS': False,
+    'OPTIONS': {},
+    'PRAGMAS': {},
+    'IMMEDIATE_TRANSACTIONS': False,
+}
+
+
+def _use_database(profile, path):
+    connections.close_all()
+    connection = connections['default']
+    connection.settings_dict.update(BASELINE, **settings.DATABASE_PROFILES[profile])
+    connection.settings_dict['NAME'] = path
+
+
+def _seed():
+    drinks = [Drink.objects.create(name=f'Bench Drink {i}', base_price=Decimal('95.00') + i) for i in range(5)]
+    sizes = [Size.objects.create(name=name, price_multiplier=Decimal(m)) for name, m in [('S', '1.00'), ('L', '1.50')]]
+    menu_catalog.invalidate()
+    return [(drink.id, size.id) for drink in drinks for size in sizes]
+
+
+def _place_orders(choices, count):
+    errors = Counter()
+    placed = 0
+    for i in range(count):
+        drink_id, size_id = choices[i % len(choices)]
+        try:
+            create_order([{'drink_id': drink_id, 'size_id': size_id, 'quantity': 1}], 'cash')
+        except OperationalError as error:
+            errors['locked' if 'locked' in str(error) else 'other'] += 1
+        else:
+            placed += 1
+    connections.close_all()
+    return placed, errors
+
+
+class Command(BaseCommand):
+    help = 'Place orders from several processes against a scratch SQLite file, with and without the production profile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8)
+        parser.add_argument('--orders', type=int, default=100, help='Orders placed by each process.')
+        parser.add_argument('--profiles', nargs='+', default=['development', 'production'])
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('This benchmark only applies to SQLite.')
+        unknown = set(options['profiles']) - set(settings.DATABASE_PROFILES)
+        if unknown:
+            raise CommandError(f'Unknown database profiles: {", ".join(sorted(unknown))}')
+
+        original = dict(connections['default'].settings_dict)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                for profile in options['profiles']:
+                    self._bench(profile, os.path.join(directory, f'{profile}.sqlite3'), options)
+        finally:
+            connections.close_all()
+            connections['default'].settings_dict.clear()
+            connections['default'].settings_dict.update(original)
+            menu_catalog.invalidate()
+
+    def _bench(self, profile, path, options):
+        _use_database(profile, path)
+        call_command('migrate', verbosity=0)
+        choices = _seed()
+        connections.close_all()
+
+        context = multiprocessing.get_context('fork')
+        start = time.perf_counter()
+        with context.Pool(options['processes']) as pool:
+            results = pool.starmap(_place_orders, [(choices, options['orders'])] * options['processes'])
+        elapsed = time.perf_counter() - start
+
+        placed = sum(process_placed for process_placed, _ in results)
+        errors = sum((process_errors for _, process_errors in results), Counter())
+        attempted = options['processes'] * options['orders']
+
+        self.stdout.write(f'profile:            {profile}')
+        self.stdout.write(f'orders placed:      {placed}/{attempted}')
+        self.stdout.write(f'orders/sec:         {placed / elapsed:.1f}')
+        self.stdout.write(f'lock errors:        {errors["locked"]} ({errors["locked"] / attempted:.1%})')
+        self.stdout.write(f'other errors:       {errors["other"]}')
+        self.stdout.write('')
@@ -0,0 +1,152 @@
+import heapq
+import math
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ordering.models import Order, OrderItem, ArchivedOrder
+from ordering.wait_times import WaitTimeModel
+
+
+HARD_CODED_WAIT = 7.5 * 60
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Replay an order log through the wait-time estimator and report prediction error and cost per update.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=['recorded', 'synthetic'], default='recorded',
+                            help='Replay the ready orders recorded in the database, or a simulated shop.')
+        parser.add_argument('--orders', type=int, default=20000, help='Orders in the synthetic log.')
+        parser.add_argument('--stations', type=int, default=2, help='Kitchen stations, for the synthetic shop and the model.')
+        parser.add_argument('--load', type=float, default=0.85, help='Kitchen utilisation of the synthetic shop.')
+        parser.add_argument('--warm-up', type=int, default=200, help='Orders replayed before errors are counted.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        if options['source'] == 'recorded':
+            log = self._recorded_log()
+        else:
+            log = self._synthetic_log(options['orders'], options['stations'], options['load'], random.Random(options['seed']))
+        if len(log) <= options['warm_up']:
+            raise CommandError(
+                f'Only {len(log)} orders with a recorded ready time; need more than --warm-up={options["warm_up"]}. '
+                'Try --source synthetic.'
+            )
+
+        self.stdout.write(f'replaying {len(log)} {options["source"]} orders over {options["stations"]} station(s)')
+        self._replay(log, options['stations'], options['warm_up'])
+
+    def _recorded_log(self):
+        items = {}
+        for order_id, drink_id, size_id, quantity in OrderItem.objects.filter(
+            order__ready_at__isnull=False,
+        ).values_list('order_id', 'drink_id', 'size_id', 'quantity').iterator():
+            items.setdefault(order_id, []).append((drink_id, size_id, quantity))
+
+        log = [
+            (created_at.timestamp(), preparing_at.timestamp() if preparing_at else None, ready_at.timestamp(), items.get(pk, []))
+            for pk, created_at, preparing_at, ready_at in Order.objects.filter(ready_at__isnull=False).values_list(
+                'pk', 'created_at', 'preparing_at', 'ready_at',
+            ).iterator()
+        ]
+        log += [
+            (
+                created_at.timestamp(), preparing_at.timestamp() if preparing_at else None, ready_at.timestamp(),
+                [(item['drink'][0], item['size'][0], item['quantity']) for item in line_items],
+            )
+            for created_at, preparing_at, ready_at, line_items in ArchivedOrder.objects.filter(
+                ready_at__isnull=False,
+            ).values_list('created_at', 'preparing_at', 'ready_at', 'line_items').iterator()
+        ]
+        return log
+
+    def _synthetic_log(self, count, stations, load, rng):
+        drinks = {drink_id: rng.uniform(60, 180) for drink_id in range(1, 13)}
+        sizes = {1: 0.85, 2: 1.0, 3: 1.25}
+
+        orders = []
+        for _ in range(count):
+            items = [
+                (rng.choice(list(drinks)), rng.choice(list(sizes)), rng.choice((1, 1, 1, 2)))
+                for _ in range(rng.choice((1, 1, 2, 3)))
+            ]
+            seconds = sum(
+                quantity * drinks[drink_id] * sizes[size_id] * rng.lognormvariate(0, 0.25)
+                for drink_id, size_id, quantity in items
+            )
+            orders.append((items, seconds))
+
+        mean_service = statistics.fmean(seconds for _, seconds in orders)
+        free = [0.0] * stations
+        arrived = 0.0
+        log = []
+        for n, (items, seconds) in enumerate(orders):
+            rush = 1 + 0.15 * math.sin(n / 300)
+            arrived += rng.expovariate(stations * load * rush / mean_service)
+            start = max(arrived, heapq.heappop(free))
+            heapq.heappush(free, start + seconds)
+            log.append((arrived, None, start + seconds, items))
+        return log
+
+    def _replay(self, log, stations, warm_up):
+        events = []
+        for index, (created_at, preparing_at, ready_at, items) in enumerate(log):
+            events.append((created_at, 0, index))
+            events.append((ready_at, 1, index))
+        events.sort()
+
+        model = WaitTimeModel(stations=stations)
+        queue = {}
+        predictions = {}
+        placed = 0
+        observe_seconds = schedule_seconds = 0.0
+        observed = schedules = queue_total = 0
+
+        for now, kind, index in events:
+            created_at, preparing_at, ready_at, items = log[index]
+            if kind == 0:
+                queue[index] = (index, created_at, items)
+                start = time.perf_counter()
+                schedule = model.schedule(queue.values(), now)
+                schedule_seconds += time.perf_counter() - start
+                schedules += 1
+                queue_total += len(queue)
+                if placed >= warm_up:
+                    predictions[index] = schedule[index]
+                placed += 1
+            else:
+                queue.pop(index, None)
+                start = time.perf_counter()
+                model.observe(created_at, ready_at, items, preparing_at)
+                observe_seconds += time.perf_counter() - start
+                observed += 1
+
+        errors = [predicted - log[index][2] for index, (predicted, _) in predictions.items()]
+        baseline = [log[index][0] + HARD_CODED_WAIT - log[index][2] for index in predictions]
+        covered = sum(1 for index, (_, ready_by) in predictions.items() if log[index][2] <= ready_by)
+        absolute = [abs(error) for error in errors]
+        baseline_absolute = [abs(error) for error in baseline]
+
+        self.stdout.write(f'{"":<26}{"estimator":>12}{"hard-coded":>12}')
+        for label, fraction in (('median absolute error', 0.5), ('p90 absolute error', 0.9)):
+            self.stdout.write(
+                f'{label:<26}{_percentile(absolute, fraction):>10.1f} s{_percentile(baseline_absolute, fraction):>10.1f} s'
+            )
+        self.stdout.write(
+            f'{"mean absolute error":<26}{statistics.fmean(absolute):>10.1f} s{statistics.fmean(baseline_absolute):>10.1f} s'
+        )
+        self.stdout.write(f'{"bias (late is +)":<26}{-statistics.fmean(errors):>10.1f} s{-statistics.fmean(baseline):>10.1f} s')
+        self.stdout.write(f'ready within upper bound:  {covered / len(predictions):.1%} of {len(predictions)} predictions')
+        self.stdout.write(f'statistics update:         {observe_seconds / observed * 1e6:.2f} us per ready order')
+        self.stdout.write(
+            f'queue schedule:            {schedule_seconds / schedules * 1e6:.2f} us per rebuild '
+            f'(mean queue {queue_total / schedules:.1f} orders)'
+        )
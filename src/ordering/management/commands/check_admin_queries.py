@@ -0,0 +1,113 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ordering.admin import OrderAdmin
+from ordering.models import Drink, Flavor, Topping, Size, Order, OrderItem, Payment
+
+
+PAGES = [
+    '/admin/ordering/order/',
+    '/admin/ordering/order/?p={deep_page}',
+    '/admin/ordering/order/?status__exact=completed',
+    '/admin/ordering/order/?created=today',
+    '/admin/ordering/order/?q={order_number}',
+    '/admin/ordering/order/{order_id}/change/',
+    '/admin/ordering/payment/',
+    '/admin/ordering/payment/?o=1',
+    '/admin/ordering/payment/?payment_method__exact=cash&created=week',
+    '/admin/ordering/payment/?q={order_number}',
+    '/admin/ordering/payment/{payment_id}/change/',
+]
+
+
+class Command(BaseCommand):
+    help = 'Load the order and payment admin pages at growing table sizes and fail if the query count changes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,5000,50000', help='Comma-separated order counts to measure at.')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        results = {}
+        with transaction.atomic():
+            user = get_user_model().objects.create_superuser('admin-query-check', 'admin@example.com', 'unused')
+            client = Client(HTTP_HOST='localhost')
+            client.force_login(user)
+
+            menu = self._seed_menu()
+            seeded = 0
+            for size in sizes:
+                self._seed(seeded, size, menu)
+                seeded = size
+                for page in PAGES:
+                    results.setdefault(page, []).append(self._measure(client, page, size))
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{"page":<64}' + ''.join(f'{size:>18}' for size in sizes))
+        unstable = []
+        for page, measurements in results.items():
+            self.stdout.write(f'{page:<64}' + ''.join(
+                f'{queries:>5} q {elapsed * 1000:>7.1f} ms' for queries, elapsed in measurements
+            ))
+            if len({queries for queries, _ in measurements}) > 1:
+                unstable.append(page)
+
+        if unstable:
+            raise CommandError(f'Query count grows with table size on: {", ".join(unstable)}')
+        self.stdout.write(self.style.SUCCESS(f'{len(PAGES)} admin pages issue a fixed number of queries.'))
+
+    def _seed_menu(self):
+        drink = Drink.objects.create(name='Admin Query Tea', base_price=Decimal('90.00'))
+        size = Size.objects.create(name='Admin Query Size', price_multiplier=Decimal('1.25'))
+        flavor = Flavor.objects.create(name='Admin Query Flavor', additional_price=Decimal('10.00'))
+        toppings = Topping.objects.bulk_create([Topping(name=f'Admin Query Topping {n}', price=Decimal('15.00')) for n in range(2)])
+        return drink, size, flavor, toppings
+
+    def _seed(self, start, end, menu):
+        now = timezone.now()
+        statuses = [status for status, _ in Order.STATUS_CHOICES]
+        methods = [method for method, _ in Payment.PAYMENT_METHOD_CHOICES]
+        for offset in range(start, end, 5000):
+            batch = range(offset, min(offset + 5000, end))
+            orders = Order.objects.bulk_create([
+                Order(
+                    order_number=f'ADM-{n:08d}', status=statuses[n % len(statuses)], total_amount=Decimal('120.00'),
+                    created_at=now - timedelta(minutes=n * 7 % (60 * 24 * 90)),
+                )
+                for n in batch
+            ])
+            Payment.objects.bulk_create([
+                Payment(
+                    order=order, payment_method=methods[n % len(methods)], amount=order.total_amount,
+                    status='completed', created_at=order.created_at,
+                )
+                for n, order in zip(batch, orders)
+            ])
+
+        drink, size, flavor, toppings = menu
+        for _ in range(3):
+            item = OrderItem.objects.create(order=orders[-1], drink=drink, size=size, flavor=flavor, item_price=Decimal('40.00'))
+            item.toppings.set(toppings)
+
+    def _measure(self, client, page, size):
+        latest = Payment.objects.select_related('order').latest('pk')
+        path = page.format(
+            order_number=latest.order.order_number, order_id=latest.order_id, payment_id=latest.pk,
+            deep_page=max(1, size // OrderAdmin.list_per_page),
+        )
+        client.get(path)
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = client.get(path)
+            elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            raise CommandError(f'GET {path} returned {response.status_code} with {size} orders.')
+        return len(queries), elapsed
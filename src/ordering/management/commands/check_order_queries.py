@@ -0,0 +1,57 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from ordering.catalog import menu_catalog
+from ordering.models import Drink, Flavor, Topping, Size, Order
+from ordering.orders import submit_order
+
+
+class Command(BaseCommand):
+    help = 'Submit orders with growing carts and fail if the number of queries depends on the cart size.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,5,20', help='Comma-separated cart sizes (line items) to submit.')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        Order().generate_order_number()
+
+        results = []
+        with transaction.atomic():
+            items = self._seed_items(max(sizes))
+            menu_catalog.invalidate()
+            submit_order(items[:1], 'cash')
+            for size in sizes:
+                with CaptureQueriesContext(connection) as queries:
+                    submit_order(items[:size], 'credit_card')
+                results.append((size, len(queries)))
+            transaction.set_rollback(True)
+        menu_catalog.invalidate()
+
+        for size, count in results:
+            self.stdout.write(f'{size:>4} line items: {count:>3} queries')
+        if len({count for _, count in results}) > 1:
+            raise CommandError('The number of queries to submit an order grows with the cart size.')
+        self.stdout.write(self.style.SUCCESS(f'Submitting an order takes {results[0][1]} queries whatever the cart size.'))
+
+    def _seed_items(self, count):
+        drinks = [Drink(name=f'Query Check Tea {n}', base_price=Decimal('90.00')) for n in range(count)]
+        sizes = [Size(name=f'Query Check Size {n}', price_multiplier=Decimal('1.25')) for n in range(2)]
+        flavors = [Flavor(name=f'Query Check Flavor {n}', additional_price=Decimal('10.00')) for n in range(2)]
+        toppings = [Topping(name=f'Query Check Topping {n}', price=Decimal('15.00')) for n in range(3)]
+        for model, rows in ((Drink, drinks), (Size, sizes), (Flavor, flavors), (Topping, toppings)):
+            model.objects.bulk_create(rows)
+
+        return [
+            {
+                'drink_id': drink.pk,
+                'size_id': sizes[n % len(sizes)].pk,
+                'flavor_id': flavors[n % len(flavors)].pk if n % 3 else None,
+                'topping_ids': [topping.pk for topping in toppings[:1 + n % len(toppings)]],
+                'quantity': 1 + n % 2,
+            }
+            for n, drink in enumerate(drinks)
+        ]
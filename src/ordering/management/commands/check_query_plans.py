@@ -0,0 +1,125 @@
+import re
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ordering.admin import OrderAdmin
+from ordering.catalog import menu_catalog
+from ordering.hot_queries import HOT_QUERIES, SMALL_TABLES, WALK_FILTERS
+from ordering.models import Drink, Flavor, Topping, Size, Order, OrderItem, Payment, ArchivedOrder
+from ordering.status_cache import status_versions
+
+
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+
+
+def _where_columns(sql):
+    where = sql.partition(' WHERE ')[2]
+    for clause in (' GROUP BY ', ' ORDER BY ', ' LIMIT '):
+        where = where.partition(clause)[0]
+    return set(re.findall(r'"(\w+)"\."(\w+)"', where))
+
+
+def limited_walk(sql, plan):
+    return (
+        ' LIMIT ' in sql
+        and not any(detail.startswith('USE TEMP B-TREE') for detail in plan)
+        and _where_columns(sql) <= WALK_FILTERS
+    )
+
+
+def full_scans(sql, plan, tables):
+    scans = [
+        detail for detail in plan
+        if detail.startswith('SCAN ') and detail.split()[1] in tables and detail.split()[1] not in SMALL_TABLES
+    ]
+    return [] if len(scans) == 1 and limited_walk(sql, plan) else scans
+
+
+class Command(BaseCommand):
+    help = 'Run every registered hot path, explain each query it issues and fail on full table scans.'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Query plans are only checked on SQLite.')
+
+        Order().generate_order_number()
+        captured = []
+        with transaction.atomic():
+            sample = self._seed()
+            menu_catalog.invalidate()
+            client = Client(HTTP_HOST='localhost')
+            client.force_login(get_user_model().objects.create_superuser('query-plan-check', 'plans@example.com', 'unused'))
+            for label, run in HOT_QUERIES:
+                with CaptureQueriesContext(connection) as queries:
+                    response = run(client, sample)
+                if getattr(response, 'status_code', 200) >= 400:
+                    raise CommandError(f'{label} returned {response.status_code}.')
+                captured += [(label, query['sql']) for query in queries]
+
+            plans = {}
+            with connection.cursor() as cursor:
+                for label, sql in captured:
+                    if sql in plans or not sql.lstrip().upper().startswith(EXPLAINED):
+                        continue
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                    plans[sql] = (label, [row[3] for row in cursor.fetchall()])
+            transaction.set_rollback(True)
+        menu_catalog.invalidate()
+        for order_number in (sample['order_number'], sample['other_order_number'], sample['archived_order_number']):
+            status_versions.forget(order_number)
+
+        tables = set(connection.introspection.table_names())
+        failures = []
+        for sql, (label, plan) in plans.items():
+            scans = full_scans(sql, plan, tables)
+            if options['verbosity'] > 1 or scans:
+                self.stdout.write(f'{label}: {sql}')
+                for detail in plan:
+                    self.stdout.write(f'    {detail}')
+            if scans and label not in failures:
+                failures.append(label)
+
+        if failures:
+            raise CommandError(f'Full table scans in: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(plans)} distinct queries from {len(HOT_QUERIES)} hot paths checked, no full table scans.'
+        ))
+
+    def _seed(self):
+        drink = Drink.objects.create(name='Query Plan Tea', base_price=Decimal('90.00'))
+        size = Size.objects.create(name='Query Plan Size', price_multiplier=Decimal('1.25'))
+        flavor = Flavor.objects.create(name='Query Plan Flavor', additional_price=Decimal('10.00'))
+        toppings = Topping.objects.bulk_create([
+            Topping(name=f'Query Plan Topping {n}', price=Decimal('15.00')) for n in range(2)
+        ])
+
+        now = timezone.now()
+        rows = OrderAdmin.list_per_page + 1
+        orders = Order.objects.bulk_create([
+            Order(order_number=f'PLAN-{n}', status=('placed', 'completed')[n % 2], total_amount=Decimal('142.50'), created_at=now)
+            for n in range(rows)
+        ])
+        payments = Payment.objects.bulk_create([
+            Payment(order=order, payment_method='cash', amount=order.total_amount, status='completed', created_at=now)
+            for order in orders
+        ])
+        for order in orders[:2]:
+            item = OrderItem.objects.create(order=order, drink=drink, size=size, flavor=flavor, item_price=Decimal('142.50'))
+            item.toppings.set(toppings)
+        ArchivedOrder.objects.bulk_create([
+            ArchivedOrder(order_number=f'PLAN-A{n}', created_at=now, updated_at=now) for n in range(rows)
+        ])
+
+        return {
+            'drink_id': drink.pk, 'size_id': size.pk, 'flavor_id': flavor.pk,
+            'topping_ids': [topping.pk for topping in toppings],
+            'order_id': orders[0].pk, 'order_number': orders[0].order_number,
+            'other_order_number': orders[1].order_number,
+            'payment_id': payments[0].pk, 'archived_order_number': 'PLAN-A0',
+        }
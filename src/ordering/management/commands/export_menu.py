@@ -0,0 +1,25 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from ordering.menu_io import FORMATS, MENU_MODELS, guess_format, write_rows
+
+
+class Command(BaseCommand):
+    help = 'Export drinks, flavors, toppings or sizes as CSV, JSON or JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(MENU_MODELS))
+        parser.add_argument('--output', '-o', default='-', help="File to write, or '-' for standard output.")
+        parser.add_argument('--format', choices=FORMATS, help='Output format (default: guessed from the file extension).')
+
+    def handle(self, *args, **options):
+        path = options['output']
+        format = options['format'] or guess_format(path)
+
+        if path == '-':
+            write_rows(options['model'], sys.stdout, format)
+            return
+        with open(path, 'w', newline='', encoding='utf-8') as stream:
+            count = write_rows(options['model'], stream, format)
+        self.stderr.write(f'Exported {count} {options["model"]}(s) to {path}.')
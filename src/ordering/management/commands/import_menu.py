@@ -0,0 +1,46 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ordering.menu_io import FORMATS, MENU_MODELS, MenuImporter, MenuImportError, guess_format, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import drinks, flavors, toppings or sizes from a CSV, JSON or JSON Lines file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(MENU_MODELS))
+        parser.add_argument('path', help="File to import, or '-' for standard input.")
+        parser.add_argument('--format', choices=FORMATS, help='Input format (default: guessed from the file extension).')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Validate and diff the file, then roll back.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or guess_format(path)
+        importer = MenuImporter(options['model'], batch_size=options['batch_size'])
+
+        start = time.perf_counter()
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            importer.run(read_rows(stream, format), dry_run=options['dry_run'])
+        except MenuImportError as exc:
+            for line, message in exc.errors:
+                self.stderr.write(f'row {line}: {message}' if line else message)
+            raise CommandError(f'Import aborted: {exc}. Nothing was written.')
+        except ValueError as exc:
+            raise CommandError(f'Could not read {path}: {exc}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - start
+
+        summary = (
+            f'{importer.created} created, {importer.updated} updated, {importer.unchanged} unchanged '
+            f'in {elapsed:.2f}s'
+        )
+        if options['dry_run']:
+            self.stdout.write(f'Dry run: {summary}. Nothing was written.')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Imported {options["model"]}s: {summary}.'))
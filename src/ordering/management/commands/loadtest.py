@@ -0,0 +1,275 @@
+import asyncio
+import json
+import math
+import random
+import time
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import Resolver404, resolve
+
+from ordering.catalog import get_menu
+from ordering.models import Payment
+
+
+class JourneyError(Exception):
+    pass
+
+
+class HttpSession:
+    """Minimal keep-alive HTTP/1.1 client with a cookie jar, one per customer."""
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.cookies = {}
+        self._reader = None
+        self._writer = None
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+        self._reader = self._writer = None
+
+    async def request(self, method, path, data=None, headers=None):
+        body = urlencode(data, doseq=True).encode() if data is not None else b''
+        lines = [
+            f'{method} {path} HTTP/1.1',
+            f'Host: {self.host}:{self.port}',
+            'Connection: keep-alive',
+            f'Content-Length: {len(body)}',
+        ]
+        if data is not None:
+            lines.append('Content-Type: application/x-www-form-urlencoded')
+        if self.cookies:
+            lines.append('Cookie: ' + '; '.join(f'{name}={value}' for name, value in self.cookies.items()))
+        lines.extend(f'{name}: {value}' for name, value in (headers or {}).items())
+        payload = ('\r\n'.join(lines) + '\r\n\r\n').encode() + body
+
+        for attempt in range(2):
+            if self._writer is None:
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                self._writer.write(payload)
+                await self._writer.drain()
+                return await asyncio.wait_for(self._read_response(), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if attempt:
+                    raise
+
+    async def _read_response(self):
+        status_line = await self._reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = defaultdict(list)
+        while True:
+            line = await self._reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()].append(value.strip())
+
+        if 'content-length' in headers:
+            body = await self._reader.readexactly(int(headers['content-length'][0]))
+        elif 'chunked' in ''.join(headers.get('transfer-encoding', [])).lower():
+            body = b''
+            while True:
+                size = int((await self._reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if not size:
+                    break
+                body += chunk[:-2]
+        else:
+            body = await self._reader.read()
+            await self.close()
+
+        if 'close' in ''.join(headers.get('connection', [])).lower():
+            await self.close()
+
+        for cookie in headers.get('set-cookie', []):
+            for name, morsel in SimpleCookie(cookie).items():
+                if morsel['max-age'] == '0' or not morsel.value:
+                    self.cookies.pop(name, None)
+                else:
+                    self.cookies[name] = morsel.value
+        return status, {name: values[-1] for name, values in headers.items()}, body
+
+
+class LoadTest:
+
+    def __init__(self, base_url, menu, options):
+        parts = urlsplit(base_url)
+        if parts.scheme != 'http' or not parts.hostname:
+            raise CommandError('Only plain http:// server URLs are supported.')
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.menu = menu
+        self.options = options
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.completed = 0
+        self.failed = 0
+
+    def _view_name(self, path):
+        try:
+            return resolve(path.split('?')[0]).url_name
+        except Resolver404:
+            return path
+
+    async def _call(self, session, method, path, expect, data=None, headers=None):
+        view = self._view_name(path)
+        start = time.perf_counter()
+        try:
+            status, response_headers, body = await session.request(method, self.prefix + path, data, headers)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as error:
+            self.errors[view] += 1
+            raise JourneyError(f'{method} {path}: {error!r}')
+        self.latencies[view].append(time.perf_counter() - start)
+        if status not in expect:
+            self.errors[view] += 1
+            raise JourneyError(f'{method} {path}: HTTP {status}')
+        return status, response_headers, body
+
+    def _csrf(self, session):
+        return {'X-CSRFToken': session.cookies.get('csrftoken', '')}
+
+    def _pick_item(self):
+        drink = random.choice(self.menu.available_drinks)
+        size = random.choice(self.menu.sizes)
+        item = {'drink_id': drink.id, 'size_id': size.id, 'quantity': random.randint(1, 3)}
+        if self.menu.flavors and random.random() < 0.5:
+            item['flavor_id'] = random.choice(self.menu.flavors).id
+        if self.menu.toppings:
+            toppings = random.sample(self.menu.toppings, k=random.randint(0, min(2, len(self.menu.toppings))))
+            item['toppings'] = [topping.id for topping in toppings]
+        return item
+
+    async def customer(self):
+        session = HttpSession(self.host, self.port, self.options['timeout'])
+        try:
+            await self._call(session, 'GET', '/', {200})
+            await self._call(session, 'GET', '/menu/', {200})
+            await self._call(session, 'GET', '/choose-specifics/', {200})
+            for _ in range(self.options['drinks']):
+                await self._call(session, 'POST', '/choose-specifics/', {302}, self._pick_item(), self._csrf(session))
+            await self._call(session, 'GET', '/payment-method/', {200})
+            payment_method = random.choice([method for method, _ in Payment.PAYMENT_METHOD_CHOICES])
+            await self._call(session, 'POST', '/payment-method/', {302}, {'payment_method': payment_method}, self._csrf(session))
+            await self._call(session, 'GET', '/counter/', {200})
+
+            _, headers, _ = await self._call(session, 'POST', '/place-order/', {302}, {}, self._csrf(session))
+            wait_path = urlsplit(headers.get('location', '')).path[len(self.prefix):]
+            if not wait_path.startswith('/wait/'):
+                raise JourneyError(f'place-order redirected to {wait_path!r}')
+            order_number = wait_path.rstrip('/').rsplit('/', 1)[-1]
+
+            await self._call(session, 'GET', wait_path, {200})
+            etag = None
+            for _ in range(self.options['polls']):
+                await asyncio.sleep(self.options['poll_interval'])
+                _, headers, _ = await self._call(
+                    session, 'GET', f'/api/order-status/{order_number}/', {200, 304},
+                    headers={'If-None-Match': etag} if etag else None,
+                )
+                etag = headers.get('etag', etag)
+
+            await self._call(session, 'GET', f'/receive/{order_number}/', {200})
+            await self._call(session, 'POST', f'/receive/{order_number}/', {302}, {}, self._csrf(session))
+            await self._call(session, 'GET', f'/enjoy/{order_number}/', {200})
+        except JourneyError:
+            self.failed += 1
+        else:
+            self.completed += 1
+        finally:
+            await session.close()
+
+    async def run(self):
+        semaphore = asyncio.Semaphore(self.options['concurrency'])
+        ramp_up = self.options['ramp_up']
+        customers = self.options['customers']
+
+        async def arrive(index):
+            if ramp_up:
+                await asyncio.sleep(ramp_up * index / customers)
+            async with semaphore:
+                await self.customer()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(arrive(index) for index in range(customers)))
+        return time.perf_counter() - start
+
+    def report(self, elapsed):
+        requests = sum(len(samples) for samples in self.latencies.values()) + sum(self.errors.values())
+        views = {}
+        for view in sorted(set(self.latencies) | set(self.errors)):
+            samples = sorted(self.latencies[view])
+            count = len(samples) + self.errors[view]
+            views[view] = {
+                'requests': count,
+                'errors': self.errors[view],
+                'error_rate': round(self.errors[view] / count, 4),
+                'p50_ms': _percentile_ms(samples, 50),
+                'p95_ms': _percentile_ms(samples, 95),
+                'p99_ms': _percentile_ms(samples, 99),
+                'max_ms': round(samples[-1] * 1000, 2) if samples else None,
+            }
+        customers = self.completed + self.failed
+        return {
+            'customers': customers,
+            'completed': self.completed,
+            'failed': self.failed,
+            'error_rate': round(self.failed / customers, 4) if customers else 0,
+            'concurrency': self.options['concurrency'],
+            'duration_s': round(elapsed, 3),
+            'throughput': {
+                'requests_per_s': round(requests / elapsed, 1),
+                'customers_per_min': round(self.completed / elapsed * 60, 1),
+            },
+            'views': views,
+        }
+
+
+def _percentile_ms(samples, percentile):
+    if not samples:
+        return None
+    index = max(0, math.ceil(percentile / 100 * len(samples)) - 1)
+    return round(samples[index] * 1000, 2)
+
+
+class Command(BaseCommand):
+    help = 'Drive the full customer journey against a running server with many concurrent customers and report latency as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the server under test.')
+        parser.add_argument('--customers', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=200, help='Customers in flight at the same time.')
+        parser.add_argument('--ramp-up', type=float, default=0.0, help='Seconds over which customers arrive.')
+        parser.add_argument('--drinks', type=int, default=2, help='Drinks added to each cart.')
+        parser.add_argument('--polls', type=int, default=3, help='Status polls while waiting for the drink.')
+        parser.add_argument('--poll-interval', type=float, default=0.5)
+        parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds.')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--output', help='Also write the JSON report to this file.')
+
+    def handle(self, *args, **options):
+        menu = get_menu()
+        if not menu.available_drinks or not menu.sizes:
+            raise CommandError('The menu needs at least one available drink and one size.')
+        random.seed(options['seed'])
+
+        loadtest = LoadTest(options['url'], menu, options)
+        elapsed = asyncio.run(loadtest.run())
+        report = json.dumps(loadtest.report(elapsed), indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report + '\n')
+        self.stdout.write(report)
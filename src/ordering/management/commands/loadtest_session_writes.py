@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ordering.catalog import menu_catalog
+from ordering.models import Drink, Flavor, Topping, Size
+
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class Command(BaseCommand):
+    help = 'Run the ordering flow under each session store and count database writes per completed order.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=50)
+        parser.add_argument('--drinks', type=int, default=2, help='Drinks added to each cart.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            catalog = self._seed()
+            menu_catalog.invalidate()
+            for store, engine in settings.SESSION_ENGINES.items():
+                with override_settings(SESSION_ENGINE=engine):
+                    self._run(store, catalog, options['orders'], options['drinks'])
+            transaction.set_rollback(True)
+        menu_catalog.invalidate()
+
+    def _seed(self):
+        drink = Drink.objects.create(name='Load Test Tea', base_price=Decimal('100.00'))
+        size = Size.objects.create(name='Load Test Size', price_multiplier=Decimal('1.25'))
+        flavor = Flavor.objects.create(name='Load Test Flavor', additional_price=Decimal('10.00'))
+        topping = Topping.objects.create(name='Load Test Topping', price=Decimal('15.00'))
+        return drink, size, flavor, topping
+
+    def _journey(self, client, catalog, drinks):
+        drink, size, flavor, topping = catalog
+        client.get('/')
+        client.get('/menu/')
+        client.get('/choose-specifics/')
+        for _ in range(drinks):
+            client.post('/choose-specifics/', {
+                'drink_id': drink.id, 'size_id': size.id, 'flavor_id': flavor.id,
+                'toppings': [topping.id], 'quantity': 1,
+            })
+        client.get('/payment-method/')
+        client.post('/payment-method/', {'payment_method': 'cash'})
+        client.get('/counter/')
+        response = client.post('/place-order/')
+        if response.status_code != 302 or '/wait/' not in response['Location']:
+            raise CommandError(f'Order placement failed with status {response.status_code}.')
+        client.get(response['Location'])
+
+    def _run(self, store, catalog, orders, drinks):
+        session_writes = 0
+        total_writes = 0
+        for _ in range(orders):
+            client = Client(HTTP_HOST='localhost')
+            with CaptureQueriesContext(connection) as queries:
+                self._journey(client, catalog, drinks)
+            writes = [query['sql'] for query in queries if query['sql'].lstrip().upper().startswith(WRITE_PREFIXES)]
+            total_writes += len(writes)
+            session_writes += sum('django_session' in sql for sql in writes)
+
+        self.stdout.write(
+            f'{store:<15} {total_writes / orders:>6.1f} DB writes/order '
+            f'({session_writes / orders:.1f} to django_session)'
+        )
@@ -0,0 +1,99 @@
+import asyncio
+import time
+import tracemalloc
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+
+from ordering.models import Order
+from ordering.status_stream import status_hub
+
+
+class Waiter:
+
+    def __init__(self, order_number):
+        self.path = f'/api/order-status/{order_number}/stream/'
+        self.events = 0
+        self.disconnect = asyncio.Event()
+
+    def scope(self):
+        return {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': self.path,
+            'raw_path': self.path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'accept', b'text/event-stream')],
+            'client': ('127.0.0.1', 0),
+            'server': ('localhost', 80),
+        }
+
+    async def receive(self):
+        if not hasattr(self, '_sent_body'):
+            self._sent_body = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.body' and message.get('body', b'').startswith(b'event: status'):
+            self.events += 1
+
+
+class Command(BaseCommand):
+    help = 'Hold thousands of status streams open against the ASGI application and report memory use.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--waiters', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        order = Order.objects.create(order_number=Order().generate_order_number(), status='placed')
+        try:
+            asyncio.run(self._run(order.order_number, options['waiters']))
+        finally:
+            order.delete()
+
+    async def _wait_for(self, predicate, timeout=120):
+        deadline = time.perf_counter() + timeout
+        while not predicate():
+            if time.perf_counter() > deadline:
+                raise TimeoutError
+            await asyncio.sleep(0.05)
+
+    async def _run(self, order_number, count):
+        application = get_asgi_application()
+        waiters = [Waiter(order_number) for _ in range(count)]
+
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(application(w.scope(), w.receive, w.send)) for w in waiters]
+        await self._wait_for(lambda: all(w.events == 1 for w in waiters))
+        connect_elapsed = time.perf_counter() - start
+        held, _ = tracemalloc.get_traced_memory()
+
+        results = {}
+        for expected, status in enumerate(['preparing', 'ready', 'completed'], start=2):
+            start = time.perf_counter()
+            status_hub.publish(order_number, status)
+            await self._wait_for(lambda: all(w.events >= expected for w in waiters))
+            results[status] = time.perf_counter() - start
+
+        for waiter in waiters:
+            waiter.disconnect.set()
+        await asyncio.gather(*tasks)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(f'waiters:            {count}')
+        self.stdout.write(f'connect time:       {connect_elapsed:.2f} s')
+        self.stdout.write(f'held memory:        {(held - baseline) / 1024 / 1024:.1f} MiB ({(held - baseline) / count / 1024:.1f} KiB per waiter)')
+        self.stdout.write(f'peak memory:        {(peak - baseline) / 1024 / 1024:.1f} MiB')
+        for status, elapsed in results.items():
+            self.stdout.write(f'fan-out {status + ":":<11} {elapsed * 1000:.1f} ms')
+        self.stdout.write(f'open after finish:  {status_hub.subscriber_count()}')
@@ -0,0 +1,118 @@
+import re
+import tempfile
+from decimal import Decimal
+
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+
+from ordering.catalog import menu_catalog
+from ordering.models import Drink, Flavor, Topping, Size
+
+
+ASSET_PATTERN = re.compile(r'(?:href|src|data-price-table)="(/(?:static|api/price-table)/[^"]+)"')
+
+
+def _body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class Command(BaseCommand):
+    help = 'Collect static files through the asset pipeline and measure bytes transferred per customer journey.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accept-encoding', default='br, gzip', help='Accept-Encoding sent for asset requests.')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as static_root:
+            with override_settings(STATIC_ROOT=static_root, DEBUG=False, ALLOWED_HOSTS=['localhost']):
+                call_command('collectstatic', interactive=False, verbosity=0)
+                with transaction.atomic():
+                    catalog = self._seed()
+                    menu_catalog.invalidate()
+                    self._run(catalog, options['accept_encoding'])
+                    transaction.set_rollback(True)
+        menu_catalog.invalidate()
+
+    def _seed(self):
+        drink = Drink.objects.create(name='Static Bench Tea', base_price=Decimal('100.00'))
+        size = Size.objects.create(name='Static Bench Size', price_multiplier=Decimal('1.25'))
+        flavor = Flavor.objects.create(name='Static Bench Flavor', additional_price=Decimal('10.00'))
+        topping = Topping.objects.create(name='Static Bench Topping', price=Decimal('15.00'))
+        return drink, size, flavor, topping
+
+    def _journey(self, client, catalog):
+        drink, size, flavor, topping = catalog
+        pages = []
+
+        def get(path):
+            response = client.get(path)
+            if response.status_code != 200:
+                raise CommandError(f'GET {path} returned {response.status_code}.')
+            pages.append((path, response.content))
+
+        get('/')
+        get('/menu/')
+        get('/choose-specifics/')
+        client.post('/choose-specifics/', {
+            'drink_id': drink.id, 'size_id': size.id, 'flavor_id': flavor.id,
+            'toppings': [topping.id], 'quantity': 1,
+        })
+        get('/payment-method/')
+        client.post('/payment-method/', {'payment_method': 'cash'})
+        get('/counter/')
+        response = client.post('/place-order/')
+        if response.status_code != 302 or '/wait/' not in response['Location']:
+            raise CommandError(f'Order placement failed with status {response.status_code}.')
+        order_number = response['Location'].rstrip('/').rsplit('/', 1)[-1]
+        get(f'/wait/{order_number}/')
+        get(f'/receive/{order_number}/')
+        client.post(f'/receive/{order_number}/')
+        get(f'/enjoy/{order_number}/')
+        return pages
+
+    def _run(self, catalog, accept_encoding):
+        client = Client(HTTP_HOST='localhost')
+        pages = self._journey(client, catalog)
+        html_bytes = sum(len(content) for _, content in pages)
+
+        assets = []
+        for _, content in pages:
+            for url in ASSET_PATTERN.findall(content.decode()):
+                if url not in assets:
+                    assets.append(url)
+
+        self.stdout.write(f'{"asset":<48} {"source":>9} {"served":>9}  encoding  cache-control')
+        legacy_bytes = 0
+        pipeline_bytes = 0
+        for url in assets:
+            response = client.get(url, HTTP_ACCEPT_ENCODING=accept_encoding)
+            if response.status_code != 200:
+                raise CommandError(f'GET {url} returned {response.status_code}.')
+            served = len(_body(response))
+
+            source = 0
+            match = re.match(r'^/static/(.+?)(?:\.[0-9a-f]{12})?(\.[^./]+)$', url)
+            if match:
+                path = finders.find(match.group(1) + match.group(2))
+                if path:
+                    with open(path, 'rb') as source_file:
+                        source = len(source_file.read())
+
+            legacy_bytes += source
+            pipeline_bytes += served
+            self.stdout.write(
+                f'{url[:48]:<48} {source:>9} {served:>9}  {response.get("Content-Encoding", "identity"):<8}  '
+                f'{response.get("Cache-Control", "")}'
+            )
+
+        self.stdout.write('')
+        self.stdout.write(f'pages per journey:            {len(pages)} ({html_bytes} bytes of HTML)')
+        self.stdout.write(f'legacy assets per journey:    {legacy_bytes} bytes (raw /static/ files, re-fetched after cache expiry)')
+        self.stdout.write(f'pipeline, first journey:      {pipeline_bytes} bytes')
+        self.stdout.write(f'pipeline, repeat journeys:    0 bytes (immutable, fingerprinted)')
+        self.stdout.write(f'total per journey:            {html_bytes + legacy_bytes} -> {html_bytes + pipeline_bytes} (cold) -> {html_bytes} (warm)')
@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ordering.analytics import closed_days_between, day_is_archived, history_bounds, rollup_day
+
+
+class Command(BaseCommand):
+    help = 'Re-aggregate sales rollups for closed days from the raw order tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat, help='First day to re-aggregate (YYYY-MM-DD).')
+        parser.add_argument('--until', type=date.fromisoformat, help='Last day to re-aggregate (YYYY-MM-DD).')
+        parser.add_argument('--all', action='store_true', help='Backfill every closed day in the order history.')
+
+    def handle(self, *args, **options):
+        yesterday = timezone.localdate() - timedelta(days=1)
+
+        if options['all']:
+            first_day, last_day = history_bounds()
+            if first_day is None:
+                self.stdout.write('No orders to aggregate.')
+                return
+        else:
+            first_day = options['since'] or yesterday
+            last_day = options['until'] or (yesterday if options['since'] is None else max(first_day, yesterday))
+
+        if first_day > last_day:
+            raise CommandError('--since must not be after --until.')
+
+        days = 0
+        archived = 0
+        for day in closed_days_between(first_day, last_day):
+            if day_is_archived(day):
+                archived += 1
+                continue
+            hourly, daily = rollup_day(day)
+            days += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{day}: {hourly} hourly and {daily} daily buckets')
+
+        if archived:
+            self.stdout.write(f'Kept the rollups of {archived} archived day(s).')
+        self.stdout.write(self.style.SUCCESS(f'Re-aggregated {days} closed day(s).'))
@@ -0,0 +1,75 @@
+import multiprocessing
+import threading
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, OperationalError, IntegrityError
+
+from ordering.models import Order
+
+
+def _place_orders(count):
+    numbers = []
+    errors = Counter()
+    for _ in range(count):
+        try:
+            order = Order.objects.create(order_number=Order().generate_order_number(), status='placed')
+        except IntegrityError:
+            errors['collision'] += 1
+        except OperationalError:
+            errors['locked'] += 1
+        else:
+            numbers.append(order.order_number)
+    connections.close_all()
+    return numbers, errors
+
+
+def _run_process(threads, orders_per_thread):
+    results = []
+
+    def run():
+        results.append(_place_orders(orders_per_thread))
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    numbers = [number for thread_numbers, _ in results for number in thread_numbers]
+    errors = sum((thread_errors for _, thread_errors in results), Counter())
+    return numbers, errors
+
+
+class Command(BaseCommand):
+    help = 'Place orders from many processes and threads and check that no order number is handed out twice.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--orders', type=int, default=50, help='Orders placed by each thread.')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated orders instead of deleting them.')
+
+    def handle(self, *args, **options):
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(options['processes']) as pool:
+            results = pool.starmap(
+                _run_process,
+                [(options['threads'], options['orders'])] * options['processes'],
+            )
+
+        numbers = [number for process_numbers, _ in results for number in process_numbers]
+        errors = sum((process_errors for _, process_errors in results), Counter())
+        duplicates = [number for number, seen in Counter(numbers).items() if seen > 1]
+
+        if not options['keep']:
+            Order.objects.filter(order_number__in=numbers).delete()
+
+        self.stdout.write(f'orders placed:      {len(numbers)}')
+        self.stdout.write(f'lock errors:        {errors["locked"]}')
+        self.stdout.write(f'unique violations:  {errors["collision"]}')
+        self.stdout.write(f'duplicate numbers:  {len(duplicates)}')
+
+        if duplicates or errors['collision']:
+            raise CommandError('Order number collisions detected.')
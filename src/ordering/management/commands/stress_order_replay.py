@@ -0,0 +1,148 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+
+from ordering.catalog import menu_catalog
+from ordering.models import Drink, Size, Topping, Order, Payment
+
+
+RETRIES = 50
+
+
+def _replay(user, batch):
+    client = Client(HTTP_HOST='localhost')
+    client.force_login(user)
+    body = json.dumps({'orders': batch})
+    busy = 0
+    for _ in range(RETRIES):
+        response = client.post('/api/orders/ingest/', body, content_type='application/json')
+        if response.status_code != 503:
+            break
+        busy += 1
+        time.sleep(0.05)
+    connections.close_all()
+    if response.status_code != 200:
+        return None, busy
+    return response.json()['results'], busy
+
+
+def _run_process(threads, user, batch):
+    results = []
+
+    def run():
+        results.append(_replay(user, batch))
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay the same offline kiosk batch from many processes at once against a scratch SQLite file '
+        'and check every order is created exactly once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--orders', type=int, default=200, help='Orders in the replayed batch.')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('This stress test only applies to SQLite.')
+
+        original = dict(connections['default'].settings_dict)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                connections.close_all()
+                connections['default'].settings_dict['NAME'] = os.path.join(directory, 'replay.sqlite3')
+                call_command('migrate', verbosity=0)
+                self._stress(options)
+        finally:
+            connections.close_all()
+            connections['default'].settings_dict.clear()
+            connections['default'].settings_dict.update(original)
+            menu_catalog.invalidate()
+
+    def _stress(self, options):
+        drink = Drink.objects.create(name='Replay Tea', base_price=Decimal('90.00'))
+        size = Size.objects.create(name='Replay Size', price_multiplier=Decimal('1.25'))
+        topping_ids = [
+            Topping.objects.create(name=f'Replay Topping {n}', price=Decimal('15.00')).pk for n in range(2)
+        ]
+        menu_catalog.invalidate()
+        user = get_user_model().objects.create_user('replay-kiosk', is_staff=True)
+
+        run = uuid.uuid4().hex[:12]
+        methods = [method for method, _ in Payment.PAYMENT_METHOD_CHOICES]
+        batch = [
+            {
+                'idempotency_key': f'replay-{run}-{n}',
+                'payment_method': methods[n % len(methods)],
+                'items': [{'drink_id': drink.pk, 'size_id': size.pk, 'topping_ids': topping_ids[:n % 3], 'quantity': 1 + n % 2}],
+            }
+            for n in range(options['orders'])
+        ]
+        keys = [entry['idempotency_key'] for entry in batch]
+
+        connections.close_all()
+        start = time.perf_counter()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(options['processes']) as pool:
+            replies = [
+                reply for process_replies in pool.starmap(_run_process, [(options['threads'], user, batch)] * options['processes'])
+                for reply in process_replies
+            ]
+        elapsed = time.perf_counter() - start
+
+        failed = sum(1 for results, _ in replies if results is None)
+        busy = sum(retries for _, retries in replies)
+        numbers = {}
+        created = Counter()
+        for results, _ in replies:
+            for result in results or ():
+                numbers.setdefault(result['idempotency_key'], set()).add(result.get('order_number'))
+                if result.get('created'):
+                    created[result['idempotency_key']] += 1
+
+        rows = dict(
+            Order.objects.filter(idempotency_key__in=keys).values_list('idempotency_key')
+            .annotate(rows=Count('pk')).order_by()
+        )
+        missing = [key for key in keys if key not in rows]
+        duplicated = [key for key, count in rows.items() if count > 1]
+        inconsistent = [key for key, seen in numbers.items() if len(seen) > 1]
+        created_twice = [key for key, count in created.items() if count > 1]
+
+        replay, _ = _replay(user, batch[:10])
+        replayed_again = replay is not None and not any(result['created'] for result in replay)
+
+        self.stdout.write(f'replays:                {len(replies)} x {len(batch)} orders in {elapsed:.2f}s')
+        self.stdout.write(f'busy responses retried: {busy}')
+        self.stdout.write(f'failed replays:         {failed}')
+        self.stdout.write(f'orders stored:          {len(rows)} of {len(keys)}')
+        self.stdout.write(f'duplicated keys:        {len(duplicated)}')
+        self.stdout.write(f'created more than once: {len(created_twice)}')
+        self.stdout.write(f'inconsistent numbers:   {len(inconsistent)}')
+        self.stdout.write(f'late replay unchanged:  {replayed_again}')
+
+        if failed or missing or duplicated or inconsistent or created_twice or not replayed_again:
+            raise CommandError('Replaying the batch did not create each order exactly once.')
+        self.stdout.write(self.style.SUCCESS('Every order in the batch was created exactly once.'))
@@ -0,0 +1,260 @@
+"""
+Streaming import and export of the menu catalog tables.
+
+Files are read and written one row at a time. CSV, JSON arrays and JSON
+Lines are all parsed incrementally, so the file is never held in memory.
+Imported rows are matched to existing rows by ``id`` when the column is
+present and by ``name`` otherwise, and compared with an in-memory
+snapshot of the table. The importer also remembers every id it has
+matched so that a file naming the same row twice is rejected. Memory use
+therefore grows with the size of the table and the number of matched
+rows, roughly a kilobyte per row, which suits catalog tables but not
+bulk data. Only new or changed rows are written, through ``bulk_create``
+and ``bulk_update`` in batches inside a single transaction.
+Bulk writes do not send model signals, so the catalog is invalidated once
+when the transaction commits.
+"""
+
+import csv
+import json
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+
+from .catalog import invalidate_menu
+from .models import Drink, Flavor, Topping, Size
+
+
+MENU_MODELS = {
+    'drink': (Drink, ('name', 'base_price', 'description', 'is_available')),
+    'flavor': (Flavor, ('name', 'additional_price')),
+    'topping': (Topping, ('name', 'price')),
+    'size': (Size, ('name', 'price_multiplier')),
+}
+
+FORMATS = ('csv', 'json', 'jsonl')
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n', ''}
+
+
+class MenuImportError(ValueError):
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f'{len(errors)} invalid row(s)')
+
+
+def guess_format(path):
+    for extension in FORMATS:
+        if str(path).endswith(f'.{extension}'):
+            return extension
+    return 'csv'
+
+
+def _iter_json_array(stream, chunk_size=64 * 1024):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        while True:
+            buffer = buffer.lstrip()
+            if not started:
+                if not buffer:
+                    break
+                if buffer[0] != '[':
+                    raise ValueError('Expected a JSON array of objects.')
+                buffer = buffer[1:]
+                started = True
+                continue
+            if buffer.startswith(','):
+                buffer = buffer[1:]
+                continue
+            if buffer.startswith(']'):
+                return
+            try:
+                value, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                break
+            yield value
+            buffer = buffer[end:]
+        if not chunk:
+            raise ValueError('Unterminated JSON array.')
+
+
+def read_rows(stream, format):
+    if format == 'csv':
+        yield from csv.DictReader(stream)
+    elif format == 'jsonl':
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    elif format == 'json':
+        yield from _iter_json_array(stream)
+    else:
+        raise ValueError(f'Unknown format: {format}')
+
+
+def _export_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def write_rows(model_name, stream, format, chunk_size=2000):
+    model, fields = MENU_MODELS[model_name]
+    columns = ('id',) + fields
+    rows = model.objects.order_by('pk').values_list(*columns).iterator(chunk_size=chunk_size)
+    count = 0
+
+    if format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    elif format in ('json', 'jsonl'):
+        if format == 'json':
+            stream.write('[')
+        for row in rows:
+            record = json.dumps(dict(zip(columns, map(_export_value, row))), ensure_ascii=False)
+            if format == 'json':
+                stream.write(f'{"," if count else ""}\n{record}')
+            else:
+                stream.write(f'{record}\n')
+            count += 1
+        if format == 'json':
+            stream.write('\n]\n')
+    else:
+        raise ValueError(f'Unknown format: {format}')
+    return count
+
+
+def _clean(field, value):
+    if isinstance(field, models.BooleanField) and not isinstance(value, bool):
+        text = str(value).strip().lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+        raise ValidationError(f'“{value}” is not a valid boolean.')
+    if value is None:
+        value = ''
+    if isinstance(value, str):
+        value = value.strip()
+    if value == '' and field.has_default():
+        return field.get_default()
+    return field.clean(value, None)
+
+
+class MenuImporter:
+
+    def __init__(self, model_name, batch_size=1000):
+        self.model, self.fields = MENU_MODELS[model_name]
+        self.model_fields = {name: self.model._meta.get_field(name) for name in self.fields}
+        self.batch_size = batch_size
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = []
+        self._creates = []
+        self._updates = []
+        self._update_fields = set()
+
+    def _load_existing(self):
+        self._by_id = {}
+        self._by_name = {}
+        for row in self.model.objects.order_by('pk').values_list('pk', *self.fields).iterator(chunk_size=5000):
+            self._by_id[row[0]] = row[1:]
+            self._by_name.setdefault(row[1], row[0])
+
+    def _match(self, row):
+        raw_id = row.get('id')
+        if raw_id not in (None, ''):
+            pk = int(raw_id)
+            return pk, pk in self._by_id
+        pk = self._by_name.get(str(row.get('name', '')).strip())
+        return pk, pk is not None
+
+    def _duplicate_names(self):
+        return (
+            self.model.objects.values_list('name', flat=True)
+            .annotate(rows=models.Count('pk')).filter(rows__gt=1).order_by()
+        )
+
+    def _flush(self, force=False):
+        if self._creates and (force or len(self._creates) >= self.batch_size):
+            self.model.objects.bulk_create(self._creates, batch_size=self.batch_size)
+            self._creates = []
+        if self._updates and (force or len(self._updates) >= self.batch_size):
+            self.model.objects.bulk_update(self._updates, sorted(self._update_fields), batch_size=self.batch_size)
+            self._updates = []
+            self._update_fields = set()
+
+    def _apply(self, row, seen):
+        pk, exists = self._match(row)
+        if pk is not None and pk in seen:
+            raise ValidationError(f'duplicate row for id {pk}')
+
+        current = dict(zip(self.fields, self._by_id[pk])) if exists else {}
+        values = {}
+        for name, field in self.model_fields.items():
+            if name in row:
+                values[name] = _clean(field, row[name])
+            elif exists:
+                values[name] = current[name]
+            elif field.has_default() or field.blank:
+                values[name] = field.get_default()
+            else:
+                raise ValidationError(f'missing required column {name!r}')
+
+        if exists:
+            changed = {name for name in self.fields if values[name] != current[name]}
+            seen.add(pk)
+            if not changed:
+                self.unchanged += 1
+                return
+            self._updates.append(self.model(pk=pk, **values))
+            self._update_fields |= changed
+            self.updated += 1
+        else:
+            if pk is not None:
+                seen.add(pk)
+            self._creates.append(self.model(pk=pk, **values))
+            self.created += 1
+        self._flush()
+
+    def run(self, rows, dry_run=False, max_errors=50):
+        with transaction.atomic():
+            self._load_existing()
+            duplicates = set(self._duplicate_names())
+            seen = set()
+            for line, row in enumerate(rows, start=1):
+                if not isinstance(row, dict):
+                    self.errors.append((line, 'expected an object'))
+                else:
+                    try:
+                        self._apply(row, seen)
+                    except (ValidationError, ValueError, TypeError) as exc:
+                        messages = exc.messages if isinstance(exc, ValidationError) else [str(exc)]
+                        self.errors.append((line, '; '.join(messages)))
+                if len(self.errors) >= max_errors:
+                    break
+            if self.errors:
+                raise MenuImportError(self.errors)
+
+            self._flush(force=True)
+            added = [name for name in self._duplicate_names() if name not in duplicates]
+            if added:
+                raise MenuImportError([(None, f'duplicate name {name!r}') for name in added[:max_errors]])
+
+            if dry_run:
+                transaction.set_rollback(True)
+            elif self.created or self.updated:
+                invalidate_menu()
+        return self
@@ -0,0 +1,178 @@
+"""
+Per-view request metrics.
+
+The metrics middleware opens a ``RequestMetrics`` record for each request.
+SQL queries and template renders add to whichever record is current in the
+request's context. That context is also visible inside the
+``sync_to_async`` threads that async views use for the ORM. When the
+response is ready, the totals go into per-view histograms that are served
+in Prometheus text format.
+"""
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates, Template
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+HISTOGRAMS = (
+    ('request_duration_seconds', 'Wall time spent producing the response.', DURATION_BUCKETS),
+    ('request_db_seconds', 'Time spent executing SQL queries.', DURATION_BUCKETS),
+    ('request_template_seconds', 'Time spent rendering templates.', DURATION_BUCKETS),
+    ('request_queries', 'Number of SQL queries executed.', QUERY_BUCKETS),
+)
+
+_current = ContextVar('ordering_request_metrics', default=None)
+
+
+class RequestMetrics:
+
+    __slots__ = ('queries', 'db_time', 'template_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - start
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class InstrumentedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+class InstrumentedTemplates(DjangoTemplates):
+    """Django template backend whose templates report their render time."""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return InstrumentedTemplate(super().get_template(template_name).template, self)
+
+
+class Histogram:
+
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            yield bound, running
+
+
+class MetricsRegistry:
+
+    def __init__(self, prefix='milk_tea_'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._histograms = {name: {} for name, _, _ in HISTOGRAMS}
+        self._responses = {}
+
+    def observe(self, view, status, metrics, duration):
+        values = {
+            'request_duration_seconds': duration,
+            'request_db_seconds': metrics.db_time,
+            'request_template_seconds': metrics.template_time,
+            'request_queries': metrics.queries,
+        }
+        with self._lock:
+            for name, _, buckets in HISTOGRAMS:
+                histogram = self._histograms[name].get(view)
+                if histogram is None:
+                    histogram = self._histograms[name][view] = Histogram(buckets)
+                histogram.observe(values[name])
+            key = (view, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {name: {} for name, _, _ in HISTOGRAMS}
+            self._responses = {}
+
+    def render(self, gauges=()):
+        lines = []
+        with self._lock:
+            name = f'{self.prefix}responses_total'
+            lines.append(f'# HELP {name} Responses by view and status code.')
+            lines.append(f'# TYPE {name} counter')
+            for (view, status), count in sorted(self._responses.items()):
+                lines.append(f'{name}{{view="{_escape(view)}",status="{status}"}} {count}')
+
+            for metric, description, _ in HISTOGRAMS:
+                name = f'{self.prefix}{metric}'
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for view, histogram in sorted(self._histograms[metric].items()):
+                    label = f'view="{_escape(view)}"'
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{{label},le="{bound}"}} {count}')
+                    lines.append(f'{name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{{label}}} {histogram.total:g}')
+                    lines.append(f'{name}_count{{{label}}} {histogram.count}')
+
+        for metric, kind, description, value in gauges:
+            name = f'{self.prefix}{metric}'
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
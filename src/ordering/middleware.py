@@ -0,0 +1,62 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from .metrics import finish_request, registry, start_request
+
+
+logger = logging.getLogger('ordering.metrics')
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else '<unresolved>'
+
+
+def _record(request, response, metrics, duration):
+    view = _view_name(request)
+    registry.observe(view, response.status_code, metrics, duration)
+
+    query_budget = getattr(settings, 'REQUEST_QUERY_BUDGET', None)
+    latency_budget = getattr(settings, 'REQUEST_LATENCY_BUDGET_MS', None)
+    if (
+        (query_budget is not None and metrics.queries > query_budget)
+        or (latency_budget is not None and duration * 1000 > latency_budget)
+    ):
+        logger.warning(
+            'Request over budget: %s %s (%s) took %.1f ms with %d queries '
+            '(db %.1f ms, templates %.1f ms)',
+            request.method, request.path, view, duration * 1000, metrics.queries,
+            metrics.db_time * 1000, metrics.template_time * 1000,
+        )
+
+
+@sync_and_async_middleware
+def request_metrics_middleware(get_response):
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            metrics, token = start_request()
+            start = time.perf_counter()
+            try:
+                response = await get_response(request)
+            finally:
+                finish_request(token)
+            _record(request, response, metrics, time.perf_counter() - start)
+            return response
+
+    else:
+        def middleware(request):
+            metrics, token = start_request()
+            start = time.perf_counter()
+            try:
+                response = get_response(request)
+            finally:
+                finish_request(token)
+            _record(request, response, metrics, time.perf_counter() - start)
+            return response
+
+    return middleware
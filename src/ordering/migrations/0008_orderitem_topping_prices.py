@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ordering', '0007_order_transition_times'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='topping_prices',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -55,18 +55,49 @@ class Order(models.Model):
     total_amount = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+    preparing_at = models.DateTimeField(null=True, blank=True)
+    ready_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    
+    TRANSITION_FIELDS = {
+        'preparing': 'preparing_at',
+        'ready': 'ready_at',
+        'completed': 'completed_at',
+    }
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            models.Index(fields=['created_at'], name='order_created_idx'),
+            models.Index(fields=['ready_at'], name='order_ready_idx'),
+        ]
     
     def __str__(self):
         return f"Order #{self.order_number}"
     
+    def save(self, *args, **kwargs):
+
+        field = self.TRANSITION_FIELDS.get(self.status)
+        if field and getattr(self, field) is None:
+            setattr(self, field, timezone.now())
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = [*kwargs['update_fields'], field]
+        super().save(*args, **kwargs)
+    
     def generate_order_number(self):
         
-        import random
-        import string
-        while True:
-            number = ''.join(random.choices(string.digits, k=6))
-            if not Order.objects.filter(order_number=number).exists():
-                return number
+        from .order_numbers import get_allocator
+        return get_allocator().allocate()
+
+
+class OrderNumberSequence(models.Model):
+    
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=1)
+    
+    def __str__(self):
+        return f"{self.name} ({self.next_value})"
 
 
 class OrderItem(models.Model):
@@ -78,15 +109,15 @@ class OrderItem(models.Model):
     toppings = models.ManyToManyField(Topping, blank=True)
     quantity = models.PositiveIntegerField(default=1)
     item_price = models.DecimalField(max_digits=6, decimal_places=2)
+    topping_prices = models.JSONField(default=dict, blank=True)
     
-    def calculate_price(self):
-        
-        base_price = self.drink.base_price * self.size.price_multiplier
-        if self.flavor:
-            base_price += self.flavor.additional_price
+    def calculate_price(self, topping_ids=None):
         
-        toppings_price = sum(topping.price for topping in self.toppings.all())
-        return (base_price + toppings_price) * self.quantity
+        from .pricing import price_item
+
+        if topping_ids is None:
+            topping_ids = self.toppings.values_list('pk', flat=True) if self.pk else ()
+        return price_item(self.drink_id, self.size_id, self.flavor_id, topping_ids, self.quantity)
     
     def save(self, *args, **kwargs):
 
@@ -115,5 +146,79 @@ class Payment(models.Model):
     transaction_id = models.CharField(max_length=100, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='payment_created_idx'),
+            models.Index(fields=['payment_method', 'created_at'], name='payment_method_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='payment_status_created_idx'),
+        ]
+    
     def __str__(self):
         return f"Payment for Order #{self.order.order_number}"
+
+
+class SalesRollup(models.Model):
+    
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+    
+    DIMENSION_CHOICES = [
+        ('drink', 'Drink'),
+        ('size', 'Size'),
+        ('topping', 'Topping'),
+        ('payment_method', 'Payment Method'),
+    ]
+    
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    period_start = models.DateTimeField()
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=50)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'period_start', 'dimension', 'key'],
+                name='sales_rollup_bucket_unique',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_dimension_display()} {self.key} @ {self.period_start:%Y-%m-%d %H:00}"
+
+
+class ArchivedOrder(models.Model):
+    
+    order_number = models.CharField(max_length=20, unique=True)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES, default='completed')
+    total_amount = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+    line_items = models.JSONField(default=list)
+    payment_method = models.CharField(max_length=20, choices=Payment.PAYMENT_METHOD_CHOICES, blank=True)
+    payment_status = models.CharField(max_length=20, choices=Payment.STATUS_CHOICES, blank=True)
+    payment_amount = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    transaction_id = models.CharField(max_length=100, blank=True)
+    paid_at = models.DateTimeField(null=True, blank=True)
+    preparing_at = models.DateTimeField(null=True, blank=True)
+    ready_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='archived_order_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Order #{self.order_number} (archived)"
+    
+    @property
+    def items(self):
+        
+        from .archive import ArchivedItems
+        return ArchivedItems(self.line_items)
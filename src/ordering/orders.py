@@ -0,0 +1,317 @@
+"""
+Order placement pipeline.
+
+Everything an order needs is written in a single transaction using the ids
+already held in the session, without refetching catalog rows. Submissions
+may carry an idempotency key. It is stored under a unique index and checked
+inside the same transaction, so a retried submit returns the original
+order instead of placing a second one.
+"""
+
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from milk_tea_system.sqlite3.base import immediate_atomic
+
+from .models import Order, OrderItem, Payment, ArchivedOrder
+from .analytics import order_buckets, record_order
+from .cart import MAX_QUANTITY
+from .kitchen import active_orders
+from .pricing import PricingError, pricing_engine
+from .status_cache import status_versions
+from .status_stream import status_hub
+
+
+OrderItemTopping = OrderItem.toppings.through
+
+STATUS_SEQUENCE = [status for status, _ in Order.STATUS_CHOICES]
+
+
+def can_transition(current, new):
+    if new not in STATUS_SEQUENCE:
+        return False
+    return STATUS_SEQUENCE.index(new) > STATUS_SEQUENCE.index(current)
+
+
+def _order_items(items):
+    table = pricing_engine.table()
+    order_items = []
+    for item in items:
+        topping_ids = item.get('topping_ids', ())
+        item_price = item.get('item_price')
+        if item_price is None:
+            item_price = table.price_item(item['drink_id'], item['size_id'], item.get('flavor_id'), topping_ids, item['quantity'])
+        order_items.append((
+            OrderItem(
+                drink_id=item['drink_id'],
+                size_id=item['size_id'],
+                flavor_id=item.get('flavor_id') or None,
+                quantity=item['quantity'],
+                item_price=item_price,
+                topping_prices={
+                    str(topping_id): str(table.topping_prices.get(int(topping_id), Decimal('0.00')))
+                    for topping_id in topping_ids
+                },
+            ),
+            topping_ids,
+        ))
+    return order_items
+
+
+def _write_order(order_number, order_items, payment_method, total_amount, idempotency_key=None):
+
+    order = Order.objects.create(
+        order_number=order_number,
+        status='placed',
+        total_amount=total_amount,
+        idempotency_key=idempotency_key,
+    )
+
+    for order_item, _ in order_items:
+        order_item.order = order
+    OrderItem.objects.bulk_create([order_item for order_item, _ in order_items])
+
+    OrderItemTopping.objects.bulk_create([
+        OrderItemTopping(orderitem_id=order_item.pk, topping_id=topping_id)
+        for order_item, topping_ids in order_items
+        for topping_id in topping_ids
+    ])
+
+    Payment.objects.create(
+        order=order,
+        payment_method=payment_method,
+        amount=total_amount,
+        status='completed',
+        transaction_id=f'TXN_{order.order_number}',
+    )
+
+    record_order(
+        order.created_at,
+        order_buckets(order_items, payment_method, total_amount),
+    )
+    return order
+
+
+def orders_for_keys(idempotency_keys):
+    orders = {order.idempotency_key: order for order in Order.objects.filter(idempotency_key__in=idempotency_keys)}
+    missing = [key for key in idempotency_keys if key not in orders]
+    if missing:
+        orders.update(
+            (order.idempotency_key, order)
+            for order in ArchivedOrder.objects.filter(idempotency_key__in=missing)
+        )
+    return orders
+
+
+def order_for_key(idempotency_key):
+    return orders_for_keys([idempotency_key]).get(idempotency_key)
+
+
+def create_order(items, payment_method, total_amount=None):
+
+    order, _ = submit_order(items, payment_method, total_amount)
+    return order
+
+
+def submit_order(items, payment_method, total_amount=None, idempotency_key=None):
+    """
+    Place an order and return ``(order, created)``.
+
+    With an idempotency key, the key is looked up again inside the write
+    transaction and a retried submission returns the order the first one
+    created. A concurrent writer that wins the race is caught by the
+    unique index.
+    """
+
+    if idempotency_key:
+        existing = order_for_key(idempotency_key)
+        if existing is not None:
+            return existing, False
+
+    order_items = _order_items(items)
+    if total_amount is None:
+        total_amount = sum(order_item.item_price for order_item, _ in order_items)
+
+    order_number = Order().generate_order_number()
+
+    try:
+        with immediate_atomic():
+            if idempotency_key:
+                existing = order_for_key(idempotency_key)
+                if existing is not None:
+                    return existing, False
+            order = _write_order(order_number, order_items, payment_method, total_amount, idempotency_key)
+    except IntegrityError:
+        existing = order_for_key(idempotency_key) if idempotency_key else None
+        if existing is None:
+            raise
+        return existing, False
+
+    return order, True
+
+
+MAX_INGEST_BATCH = 500
+
+PAYMENT_METHODS = {method for method, _ in Payment.PAYMENT_METHOD_CHOICES}
+
+
+class IngestError(ValueError):
+    pass
+
+
+def _fits(model, field_name, amount):
+    field = model._meta.get_field(field_name)
+    return amount < 10 ** (field.max_digits - field.decimal_places)
+
+
+def _ingest_entry(entry):
+    if not isinstance(entry, dict):
+        raise IngestError('invalid_entry')
+
+    key = entry.get('idempotency_key')
+    if not isinstance(key, str) or not key or len(key) > 64:
+        raise IngestError('invalid_idempotency_key')
+    if entry.get('payment_method') not in PAYMENT_METHODS:
+        raise IngestError('invalid_payment_method')
+
+    items = entry.get('items')
+    if not isinstance(items, list) or not items:
+        raise IngestError('invalid_items')
+    normalized = []
+    for item in items:
+        try:
+            normalized.append({
+                'drink_id': int(item['drink_id']),
+                'size_id': int(item['size_id']),
+                'flavor_id': int(item['flavor_id']) if item.get('flavor_id') else None,
+                'topping_ids': [int(topping_id) for topping_id in item.get('topping_ids') or ()],
+                'quantity': int(item.get('quantity', 1)),
+            })
+        except (KeyError, TypeError, ValueError):
+            raise IngestError('invalid_items')
+        if not 1 <= normalized[-1]['quantity'] <= MAX_QUANTITY:
+            raise IngestError('invalid_items')
+
+    try:
+        order_items = _order_items(normalized)
+    except PricingError:
+        raise IngestError('invalid_item')
+    total_amount = sum(order_item.item_price for order_item, _ in order_items)
+    if not all(_fits(OrderItem, 'item_price', order_item.item_price) for order_item, _ in order_items):
+        raise IngestError('invalid_items')
+    if not _fits(Order, 'total_amount', total_amount):
+        raise IngestError('invalid_total')
+    return key, order_items, entry['payment_method'], total_amount
+
+
+def ingest_orders(entries):
+    """
+    Place a batch of orders queued by an offline kiosk.
+
+    Every entry carries its own idempotency key, so replaying a batch, in
+    full or in part and as often as needed, creates each order exactly
+    once. Valid entries are written in one transaction, one savepoint per
+    order. Invalid entries are reported without affecting the rest.
+    """
+
+    results = {}
+    pending = []
+    for index, entry in enumerate(entries):
+        try:
+            pending.append((index,) + _ingest_entry(entry))
+        except IngestError as exc:
+            key = entry.get('idempotency_key') if isinstance(entry, dict) else None
+            results[index] = {'idempotency_key': key, 'success': False, 'error': str(exc)}
+
+    keys = list(dict.fromkeys(key for _, key, _, _, _ in pending))
+    orders = orders_for_keys(keys)
+    numbers = {key: Order().generate_order_number() for key in keys if key not in orders}
+
+    created = set()
+    with immediate_atomic():
+        orders.update(orders_for_keys(list(numbers)))
+        for _, key, order_items, payment_method, total_amount in pending:
+            if key in orders:
+                continue
+            try:
+                with transaction.atomic():
+                    orders[key] = _write_order(numbers[key], order_items, payment_method, total_amount, key)
+            except IntegrityError:
+                continue
+            created.add(key)
+
+    lost = [key for key in keys if key not in orders]
+    if lost:
+        orders.update(orders_for_keys(lost))
+
+    for index, key, _, _, _ in pending:
+        order = orders.get(key)
+        if order is None:
+            results[index] = {'idempotency_key': key, 'success': False, 'error': 'conflict'}
+            continue
+        results[index] = {
+            'idempotency_key': key,
+            'success': True,
+            'order_number': order.order_number,
+            'status': order.status,
+            'total_amount': str(order.total_amount),
+            'created': key in created,
+        }
+        created.discard(key)
+    return [results[index] for index in range(len(entries))]
+
+
+def _announce(orders):
+    for order in orders:
+        status_versions.store(order)
+        status_hub.publish(order.order_number, order.status)
+        active_orders.transition(order.order_number, order.status)
+
+
+def apply_status_updates(updates):
+
+    requested = {}
+    for update in updates:
+        requested[str(update.get('order_number'))] = update.get('status')
+
+    now = timezone.now()
+    results = {}
+    groups = {}
+
+    with transaction.atomic():
+        orders = {
+            order.order_number: order
+            for order in Order.objects.filter(order_number__in=list(requested)).only(
+                'id', 'order_number', 'status', 'total_amount', 'updated_at',
+            )
+        }
+
+        for order_number, status in requested.items():
+            order = orders.get(order_number)
+            if order is None:
+                results[order_number] = {'success': False, 'error': 'not_found'}
+            elif order.status == status:
+                results[order_number] = {'success': True, 'status': status}
+            elif not can_transition(order.status, status):
+                results[order_number] = {'success': False, 'error': 'invalid_transition', 'status': order.status}
+            else:
+                groups.setdefault(status, []).append(order)
+
+        changed = []
+        for status, group in groups.items():
+            stamps = {Order.TRANSITION_FIELDS[status]: now} if status in Order.TRANSITION_FIELDS else {}
+            Order.objects.filter(
+                order_number__in=[order.order_number for order in group],
+                status__in=STATUS_SEQUENCE[:STATUS_SEQUENCE.index(status)],
+            ).update(status=status, updated_at=now, **stamps)
+            for order in group:
+                order.status = status
+                order.updated_at = now
+                results[order.order_number] = {'success': True, 'status': status}
+            changed.extend(group)
+
+        transaction.on_commit(lambda: _announce(changed))
+
+    return [dict(order_number=order_number, **results[order_number]) for order_number in requested]
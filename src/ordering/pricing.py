@@ -0,0 +1,177 @@
+"""
+Server-side pricing engine.
+
+Prices are precompiled from the menu catalog snapshot into flat lookup
+tables keyed by id, so pricing an item or a whole cart never touches the
+database. When the catalog version changes, only the drink x size entries
+whose inputs actually changed are recomputed.
+
+Each table also has a compact JSON form for the browser. Amounts in it are
+integers in units of 1/10000, which is exact for a two-decimal price times
+a two-decimal multiplier. The client can then add them up and round half up
+to cents exactly like ``price_item`` does.
+"""
+
+import hashlib
+import json
+import threading
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.utils.functional import cached_property
+
+from .catalog import get_menu
+
+
+CENT = Decimal('0.01')
+CLIENT_SCALE = 10000
+
+
+def _scaled(amount):
+    return int((amount * CLIENT_SCALE).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+class PricingError(LookupError):
+    pass
+
+
+def _to_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise PricingError(f'Invalid catalog id: {value!r}')
+
+
+class PriceTable:
+
+    def __init__(self, version, drink_prices, size_multipliers, base_prices, flavor_prices, topping_prices):
+        self.version = version
+        self.drink_prices = drink_prices
+        self.size_multipliers = size_multipliers
+        self.base_prices = base_prices
+        self.flavor_prices = flavor_prices
+        self.topping_prices = topping_prices
+
+    @classmethod
+    def build(cls, snapshot, previous=None):
+        drink_prices = {drink.id: drink.base_price for drink in snapshot.drinks}
+        size_multipliers = {size.id: size.price_multiplier for size in snapshot.sizes}
+
+        if previous is None:
+            stale_drinks = set(drink_prices)
+            base_prices = {}
+        else:
+            stale_drinks = {
+                drink_id for drink_id, price in drink_prices.items()
+                if previous.drink_prices.get(drink_id) != price
+            }
+            stale_sizes = {
+                size_id for size_id, multiplier in size_multipliers.items()
+                if previous.size_multipliers.get(size_id) != multiplier
+            }
+            base_prices = {
+                key: price for key, price in previous.base_prices.items()
+                if key[0] in drink_prices and key[0] not in stale_drinks
+                and key[1] in size_multipliers and key[1] not in stale_sizes
+            }
+            for size_id in stale_sizes:
+                multiplier = size_multipliers[size_id]
+                for drink_id, price in drink_prices.items():
+                    base_prices[(drink_id, size_id)] = price * multiplier
+
+        for drink_id in stale_drinks:
+            price = drink_prices[drink_id]
+            for size_id, multiplier in size_multipliers.items():
+                base_prices[(drink_id, size_id)] = price * multiplier
+
+        return cls(
+            version=snapshot.version,
+            drink_prices=drink_prices,
+            size_multipliers=size_multipliers,
+            base_prices=base_prices,
+            flavor_prices={flavor.id: flavor.additional_price for flavor in snapshot.flavors},
+            topping_prices={topping.id: topping.price for topping in snapshot.toppings},
+        )
+
+    @cached_property
+    def client_json(self):
+        base = {}
+        for (drink_id, size_id), price in self.base_prices.items():
+            base.setdefault(str(drink_id), {})[str(size_id)] = _scaled(price)
+        return json.dumps({
+            'version': self.version,
+            'scale': CLIENT_SCALE,
+            'base': base,
+            'flavors': {str(flavor_id): _scaled(price) for flavor_id, price in self.flavor_prices.items()},
+            'toppings': {str(topping_id): _scaled(price) for topping_id, price in self.topping_prices.items()},
+        }, separators=(',', ':'), sort_keys=True).encode()
+
+    @cached_property
+    def digest(self):
+        return hashlib.sha256(self.client_json).hexdigest()[:16]
+
+    def unit_price(self, drink_id, size_id, flavor_id=None, topping_ids=()):
+        try:
+            price = self.base_prices[(_to_id(drink_id), _to_id(size_id))]
+            if flavor_id:
+                price += self.flavor_prices[_to_id(flavor_id)]
+            for topping_id in topping_ids:
+                price += self.topping_prices[_to_id(topping_id)]
+        except KeyError as exc:
+            raise PricingError(f'Unknown catalog item: {exc.args[0]!r}')
+        return price
+
+    def price_item(self, drink_id, size_id, flavor_id=None, topping_ids=(), quantity=1):
+        price = self.unit_price(drink_id, size_id, flavor_id, topping_ids) * int(quantity)
+        return price.quantize(CENT, rounding=ROUND_HALF_UP)
+
+    def price_cart(self, items):
+        line_prices = [
+            self.price_item(
+                item['drink_id'],
+                item['size_id'],
+                item.get('flavor_id'),
+                item.get('topping_ids', ()),
+                item.get('quantity', 1),
+            )
+            for item in items
+        ]
+        return line_prices, sum(line_prices, Decimal('0.00'))
+
+
+class PricingEngine:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._table = None
+        self.rebuilds = 0
+
+    def table(self):
+        snapshot = get_menu()
+        table = self._table
+        if table is not None and table.version == snapshot.version:
+            return table
+
+        with self._lock:
+            table = self._table
+            if table is None or table.version != snapshot.version:
+                table = PriceTable.build(snapshot, previous=table)
+                self._table = table
+                self.rebuilds += 1
+            return table
+
+    def price_item(self, drink_id, size_id, flavor_id=None, topping_ids=(), quantity=1):
+        return self.table().price_item(drink_id, size_id, flavor_id, topping_ids, quantity)
+
+    def price_cart(self, items):
+        return self.table().price_cart(items)
+
+
+pricing_engine = PricingEngine()
+
+
+def price_item(drink_id, size_id, flavor_id=None, topping_ids=(), quantity=1):
+    return pricing_engine.price_item(drink_id, size_id, flavor_id, topping_ids, quantity)
+
+
+def price_cart(items):
+    return pricing_engine.price_cart(items)
@@ -0,0 +1,103 @@
+"""
+Status versions for conditional GETs on the order-status API.
+
+Every status write records a new ETag for the order in the shared cache
+backend and keeps the serialized status body in a small in-process LRU.
+Repeat polls compare against the recorded ETag and are answered without
+touching the ORM or re-serializing JSON.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+ETAG_KEY = 'ordering:order-status:etag:{}'
+ETAG_TIMEOUT = 6 * 60 * 60
+
+
+def make_etag(order):
+    return f'"{order.status}.{int(order.updated_at.timestamp() * 1000000):x}"'
+
+
+def etag_status(etag):
+    return etag.strip('"').split('.', 1)[0]
+
+
+def serialize_status(order):
+    return json.dumps({
+        'status': order.status,
+        'order_number': order.order_number,
+        'total_amount': str(order.total_amount),
+    }).encode()
+
+
+class StatusVersionCache:
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def current_etag(self, order_number):
+        return cache.get(ETAG_KEY.format(order_number))
+
+    async def acurrent_etag(self, order_number):
+        return await cache.aget(ETAG_KEY.format(order_number))
+
+    def body(self, order_number, etag):
+        with self._lock:
+            entry = self._entries.get(order_number)
+            if entry is None or entry[0] != etag:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(order_number)
+            self.hits += 1
+            return entry[1]
+
+    def _remember(self, order):
+        etag = make_etag(order)
+        body = serialize_status(order)
+        with self._lock:
+            self._entries[order.order_number] = (etag, body)
+            self._entries.move_to_end(order.order_number)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return etag, body
+
+    def store(self, order, overwrite=True):
+        etag, body = self._remember(order)
+        if overwrite:
+            cache.set(ETAG_KEY.format(order.order_number), etag, timeout=ETAG_TIMEOUT)
+        else:
+            cache.add(ETAG_KEY.format(order.order_number), etag, timeout=ETAG_TIMEOUT)
+        return etag, body
+
+    async def astore(self, order, overwrite=True):
+        etag, body = self._remember(order)
+        if overwrite:
+            await cache.aset(ETAG_KEY.format(order.order_number), etag, timeout=ETAG_TIMEOUT)
+        else:
+            await cache.aadd(ETAG_KEY.format(order.order_number), etag, timeout=ETAG_TIMEOUT)
+        return etag, body
+
+    def forget(self, order_number):
+        with self._lock:
+            self._entries.pop(order_number, None)
+        cache.delete(ETAG_KEY.format(order_number))
+
+
+status_versions = StatusVersionCache()
+
+
+def record_order_status(sender, instance, **kwargs):
+    transaction.on_commit(lambda: status_versions.store(instance))
+
+
+def forget_order_status(sender, instance, **kwargs):
+    transaction.on_commit(lambda: status_versions.forget(instance.order_number))
@@ -0,0 +1,132 @@
+"""
+In-process pub/sub hub for order status changes.
+
+Status writes publish to the hub once their transaction commits, and every
+open status stream for that order is woken up. A subscriber only keeps the
+latest status it has been told about, so a waiter costs the same amount of
+memory no matter how many updates are published.
+
+The hub only spans one process. On every keepalive tick a stream also
+reads the order's status from its ETag in the shared cache, so a status
+written by another worker reaches the client within ``KEEPALIVE_SECONDS``.
+Events carry the current wait-time estimate, and a keepalive is replaced
+by a fresh event when the estimate has moved.
+"""
+
+import asyncio
+import json
+import threading
+
+from django.db import transaction
+
+from .models import Order, ArchivedOrder
+from .status_cache import etag_status, status_versions
+from .wait_times import QUEUED_STATUSES, wait_times
+
+
+KEEPALIVE_SECONDS = 15
+MAX_STREAM_SECONDS = 30 * 60
+
+
+class StatusSubscription:
+
+    __slots__ = ('loop', 'event', 'status')
+
+    def __init__(self, loop, status):
+        self.loop = loop
+        self.event = asyncio.Event()
+        self.status = status
+
+    def notify(self, status):
+        self.status = status
+        self.event.set()
+
+
+class StatusHub:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, order_number, status):
+        subscription = StatusSubscription(asyncio.get_running_loop(), status)
+        with self._lock:
+            self._subscribers.setdefault(order_number, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, order_number, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(order_number)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[order_number]
+
+    def publish(self, order_number, status):
+        with self._lock:
+            subscribers = list(self._subscribers.get(order_number, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.notify, status)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+status_hub = StatusHub()
+
+
+def publish_status(order_number, status):
+    transaction.on_commit(lambda: status_hub.publish(order_number, status))
+
+
+def format_event(order_number, status, estimate=None):
+    data = json.dumps({'order_number': order_number, 'status': status, **(estimate or {})})
+    return f'event: status\ndata: {data}\n\n'
+
+
+async def acurrent_status(order_number):
+    status = await Order.objects.filter(order_number=order_number).values_list('status', flat=True).afirst()
+    if status is None:
+        status = await ArchivedOrder.objects.filter(order_number=order_number).values_list('status', flat=True).afirst()
+    return status
+
+
+async def _status_event(order_number, status):
+    estimate = await wait_times.aestimate(order_number) if status in QUEUED_STATUSES else None
+    return estimate, format_event(order_number, status, estimate)
+
+
+async def status_events(order_number, status):
+    subscription = status_hub.subscribe(order_number, status)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + MAX_STREAM_SECONDS
+    try:
+        estimate, event = await _status_event(order_number, status)
+        yield event
+        while status != 'completed' and loop.time() < deadline:
+            try:
+                await asyncio.wait_for(subscription.event.wait(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                etag = await status_versions.acurrent_etag(order_number)
+                current = etag_status(etag) if etag is not None else await acurrent_status(order_number)
+                if current is not None and current != status:
+                    status = current
+                    estimate, event = await _status_event(order_number, status)
+                    yield event
+                    continue
+
+                if status in QUEUED_STATUSES:
+                    previous, estimate = estimate, await wait_times.aestimate(order_number)
+                    if estimate is not None and (previous or {}).get('estimated_ready_at') != estimate['estimated_ready_at']:
+                        yield format_event(order_number, status, estimate)
+                        continue
+                yield ': keepalive\n\n'
+                continue
+            subscription.event.clear()
+            if subscription.status != status:
+                status = subscription.status
+                estimate, event = await _status_event(order_number, status)
+                yield event
+    finally:
+        status_hub.unsubscribe(order_number, subscription)
@@ -7,6 +7,7 @@ urlpatterns = [
     path('menu/', views.browse_menu, name='browse_menu'),
     path('decide/', views.decide_order, name='decide_order'),
     path('choose-specifics/', views.choose_specifics, name='choose_specifics'),
+    path('cart/remove/<int:index>/', views.remove_cart_item, name='remove_cart_item'),
     path('payment-method/', views.choose_payment_method, name='choose_payment_method'),
     path('counter/', views.proceed_to_counter, name='proceed_to_counter'),
     path('place-order/', views.place_order, name='place_order'),
@@ -14,11 +15,21 @@ urlpatterns = [
     path('receive/<str:order_number>/', views.receive_drink, name='receive_drink'),
     path('enjoy/<str:order_number>/', views.enjoy_drink, name='enjoy_drink'),
     path('exit/', views.exit_website, name='exit_website'),
+    path('kitchen/', views.kitchen_queue, name='kitchen_queue'),
+    path('sales/', views.sales_dashboard, name='sales_dashboard'),
     
 
     path('payment/', views.process_payment, name='process_payment'),
     
 
     path('api/order-status/<str:order_number>/', views.get_order_status, name='get_order_status'),
+    path('api/order-status/<str:order_number>/stream/', views.order_status_stream, name='order_status_stream'),
+    path('api/update-status/', views.update_order_statuses, name='update_order_statuses'),
     path('api/update-status/<str:order_number>/', views.update_order_status, name='update_order_status'),
+    path('api/kitchen-queue/', views.kitchen_queue_api, name='kitchen_queue_api'),
+    path('api/orders/', views.order_history, name='order_history'),
+    path('api/orders/ingest/', views.ingest_order_batch, name='ingest_order_batch'),
+    path('api/price-table/<str:digest>/', views.price_table, name='price_table'),
+    path('api/catalog-stats/', views.catalog_stats, name='catalog_stats'),
+    path('api/metrics/', views.metrics, name='metrics'),
 ]
@@ -1,9 +1,30 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
+from django.shortcuts import render, redirect
+from django.core.handlers.asgi import ASGIRequest
+from django.db import OperationalError
+from django.db.models import Prefetch
+from django.http import JsonResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags
 from django.contrib import messages
-from .models import Drink, Flavor, Topping, Size, Order, OrderItem, Payment
+from django.contrib.admin.views.decorators import staff_member_required
+from .models import Order, OrderItem, Payment, SalesRollup, ArchivedOrder
+from .cart import Cart, MAX_QUANTITY
+from .catalog import get_menu, menu_catalog
+from .fragments import menu_fragments
+from .pricing import price_item, pricing_engine, PricingError
+from .orders import MAX_INGEST_BATCH, apply_status_updates, ingest_orders, order_for_key, submit_order
+from .status_stream import acurrent_status, publish_status, status_events
+from .status_cache import etag_status, status_versions
+from .kitchen import active_orders
+from .wait_times import QUEUED_STATUSES, describe_wait, wait_times
+from .analytics import summarize
+from .archive import find_order, afind_order
+from .history import HistoryError, aiter_ndjson, decode_cursor, history_page, iter_ndjson, parse_filters, parse_limit
+from .metrics import registry as metrics_registry
 import json
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
 
 
 def enter_system(request):
@@ -11,20 +32,11 @@ def enter_system(request):
     return render(request, 'ordering/enter_system.html')
 
 
-def browse_menu(request):
+async def browse_menu(request):
     
-    drinks = Drink.objects.filter(is_available=True)
-    flavors = Flavor.objects.all()
-    toppings = Topping.objects.all()
-    sizes = Size.objects.all()
-    
-    context = {
-        'drinks': drinks,
-        'flavors': flavors,
-        'toppings': toppings,
-        'sizes': sizes,
-    }
-    return render(request, 'ordering/browse_menu.html', context)
+    menu = await menu_catalog.aget()
+    drinks_grid = await menu_fragments.arender('browse_menu_grid', menu, request)
+    return render(request, 'ordering/browse_menu.html', {'drinks_grid': drinks_grid})
 
 
 def decide_order(request):
@@ -42,139 +54,129 @@ def choose_specifics(request):
         size_id = request.POST.get('size_id')
         flavor_id = request.POST.get('flavor_id')
         topping_ids = request.POST.getlist('toppings')
-        quantity = int(request.POST.get('quantity', 1))
+        try:
+            quantity = max(1, int(request.POST.get('quantity', 1)))
+        except ValueError:
+            messages.error(request, 'Please enter the number of drinks as a whole number.')
+            return redirect('choose_specifics')
+        cart = Cart(request.session)
+
+        try:
+            room = MAX_QUANTITY - cart.quantity(drink_id, size_id, flavor_id, topping_ids)
+        except (TypeError, ValueError):
+            raise Http404('No such menu item.')
+        if quantity > room:
+            messages.warning(request, f'A cart holds at most {MAX_QUANTITY} of the same drink, so you can add {room} more.')
+            return redirect('choose_specifics')
         
-        drink = get_object_or_404(Drink, id=drink_id)
-        size = get_object_or_404(Size, id=size_id)
-        flavor = get_object_or_404(Flavor, id=flavor_id) if flavor_id else None
-        toppings = Topping.objects.filter(id__in=topping_ids)
-        
-
-        item_price = drink.base_price * size.price_multiplier
-        if flavor:
-            item_price += flavor.additional_price
-        item_price += sum(topping.price for topping in toppings)
-        item_price *= quantity
+        try:
+            item_price = price_item(drink_id, size_id, flavor_id, topping_ids, quantity)
+        except PricingError:
+            raise Http404('No such menu item.')
+
+        quoted_price = request.POST.get('quoted_price')
+        if quoted_price:
+            try:
+                quoted_price = Decimal(quoted_price)
+            except InvalidOperation:
+                quoted_price = None
+            if quoted_price is not None and not quoted_price.is_finite():
+                quoted_price = None
+            if quoted_price != item_price:
+                messages.warning(request, f'Prices have changed since the menu was loaded. This drink now costs ₱{item_price}.')
+                return redirect('choose_specifics')
         
 
-        current_item = {
-            'drink_name': drink.name,
-            'drink_id': drink_id,
-            'size_name': size.name,
-            'size_id': size_id,
-            'flavor_name': flavor.name if flavor else None,
-            'flavor_id': flavor_id,
-            'toppings': [{'name': t.name, 'id': t.id} for t in toppings],
-            'quantity': quantity,
-            'item_price': float(item_price)
-        }
-        
-        request.session['current_item'] = current_item
+        cart.add(drink_id, size_id, flavor_id, topping_ids, quantity)
         
 
         return redirect('choose_payment_method')
     
 
-    drinks = Drink.objects.filter(is_available=True)
-    flavors = Flavor.objects.all()
-    toppings = Topping.objects.all()
-    sizes = Size.objects.all()
+    drinks_grid = menu_fragments.render('choose_specifics_grid', get_menu(), request)
+    return render(request, 'ordering/choose_specifics.html', {'drinks_grid': drinks_grid})
+
+
+def remove_cart_item(request, index):
     
-    context = {
-        'drinks': drinks,
-        'flavors': flavors,
-        'toppings': toppings,
-        'sizes': sizes,
-    }
-    return render(request, 'ordering/choose_specifics.html', context)
+    if request.method == 'POST':
+        Cart(request.session).remove(index)
+    return redirect('choose_payment_method')
 
 
 def choose_payment_method(request):
     
-    current_item = request.session.get('current_item')
+    cart = Cart(request.session)
+    items, total = cart.resolve()
     
-    if not current_item:
+    if not items:
         messages.error(request, 'No item selected. Please choose your drink first.')
         return redirect('choose_specifics')
     
     if request.method == 'POST':
         payment_method = request.POST.get('payment_method')
         
-
-        current_item['payment_method'] = payment_method
-        request.session['current_item'] = current_item
+        if payment_method in dict(Payment.PAYMENT_METHOD_CHOICES):
+            cart.set_payment_method(payment_method)
+            return redirect('proceed_to_counter')
         
-
-        return redirect('proceed_to_counter')
+        messages.error(request, 'Please select a valid payment method.')
     
-    return render(request, 'ordering/choose_payment_method.html', {'current_item': current_item})
+    context = {'items': items, 'total': total, 'payment_method': cart.payment_method}
+    return render(request, 'ordering/choose_payment_method.html', context)
 
 
 def proceed_to_counter(request):
     
-    current_item = request.session.get('current_item')
+    cart = Cart(request.session)
+    items, total = cart.resolve()
     
-    if not current_item:
+    if not items:
         messages.error(request, 'No item selected. Please start your order.')
         return redirect('browse_menu')
     
-    if not current_item.get('payment_method'):
+    if not cart.payment_method:
         messages.error(request, 'Please select a payment method first.')
         return redirect('choose_payment_method')
     
-    return render(request, 'ordering/proceed_to_counter.html', {'current_item': current_item})
+    context = {
+        'items': items, 'total': total, 'payment_method': cart.payment_method,
+        'idempotency_key': uuid.uuid4().hex,
+    }
+    return render(request, 'ordering/proceed_to_counter.html', context)
+
+
+def _idempotency_key(request):
+
+    key = request.POST.get('idempotency_key') or request.headers.get('Idempotency-Key')
+    return key if key and len(key) <= 64 else None
 
 
 def place_order(request):
     
     if request.method == 'POST':
-        current_item = request.session.get('current_item')
+        idempotency_key = _idempotency_key(request)
+        if idempotency_key:
+            order = order_for_key(idempotency_key)
+            if order is not None:
+                return redirect('wait_for_drink', order_number=order.order_number)
+
+        cart = Cart(request.session)
+        items, total = cart.resolve()
         
-        if not current_item:
+        if not items:
             messages.error(request, 'No item found. Please start over.')
             return redirect('browse_menu')
         
-
-        order = Order.objects.create(
-            order_number=Order().generate_order_number(),
-            total_amount=current_item['item_price']
-        )
-        
-
-        drink = Drink.objects.get(id=current_item['drink_id'])
-        size = Size.objects.get(id=current_item['size_id'])
-        flavor = Flavor.objects.get(id=current_item['flavor_id']) if current_item['flavor_id'] else None
-        
-        order_item = OrderItem.objects.create(
-            order=order,
-            drink=drink,
-            size=size,
-            flavor=flavor,
-            quantity=current_item['quantity'],
-            item_price=current_item['item_price']
-        )
-        
-
-        if current_item.get('toppings'):
-            for topping_data in current_item['toppings']:
-                topping = Topping.objects.get(id=topping_data['id'])
-                order_item.toppings.add(topping)
-        
-
-        payment = Payment.objects.create(
-            order=order,
-            payment_method=current_item['payment_method'],
-            amount=order.total_amount,
-            status='completed',
-            transaction_id=f'TXN_{order.order_number}'
-        )
+        if not cart.payment_method:
+            messages.error(request, 'Please select a payment method first.')
+            return redirect('choose_payment_method')
         
 
-        order.status = 'placed'
-        order.save()
+        order, _ = submit_order(items, cart.payment_method, total_amount=total, idempotency_key=idempotency_key)
         
 
-        request.session['current_item'] = None
+        cart.clear()
         
         return redirect('wait_for_drink', order_number=order.order_number)
     
@@ -189,33 +191,50 @@ def process_payment(request):
     return redirect('browse_menu')
 
 
-def wait_for_drink(request, order_number):
+def _orders_with_items():
+
+    items = OrderItem.objects.select_related('drink', 'size', 'flavor').prefetch_related('toppings')
+    return Order.objects.prefetch_related(Prefetch('items', queryset=items))
+
+
+async def wait_for_drink(request, order_number):
     
-    order = get_object_or_404(Order, order_number=order_number)
-    return render(request, 'ordering/wait_for_drink.html', {'order': order})
+    order = await afind_order(order_number, _orders_with_items())
+    estimate = await wait_times.aestimate(order.order_number)
+    return render(request, 'ordering/wait_for_drink.html', {
+        'order': order,
+        'estimate': estimate,
+        'wait_label': describe_wait(estimate) if estimate else None,
+    })
 
 
 def receive_drink(request, order_number):
     
-    order = get_object_or_404(Order, order_number=order_number)
+    order = find_order(order_number)
+    if isinstance(order, ArchivedOrder):
+        if request.method == 'POST':
+            return redirect('enjoy_drink', order_number=order_number)
+        return render(request, 'ordering/receive_drink.html', {'order': order})
     
     if request.method == 'POST':
 
         order.status = 'completed'
         order.save()
+        publish_status(order.order_number, order.status)
         return redirect('enjoy_drink', order_number=order_number)
     
 
     if order.status == 'placed':
         order.status = 'ready'
         order.save()
+        publish_status(order.order_number, order.status)
     
     return render(request, 'ordering/receive_drink.html', {'order': order})
 
 
-def enjoy_drink(request, order_number):
+async def enjoy_drink(request, order_number):
     
-    order = get_object_or_404(Order, order_number=order_number)
+    order = await afind_order(order_number, _orders_with_items())
     return render(request, 'ordering/enjoy_drink.html', {'order': order})
 
 
@@ -227,27 +246,228 @@ def exit_website(request):
 
 
 
-@csrf_exempt
+def price_table(request, digest):
+
+    table = pricing_engine.table()
+    if digest != table.digest:
+        response = redirect('price_table', digest=table.digest)
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    response = HttpResponse(table.client_json, content_type='application/json')
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response['ETag'] = f'"{table.digest}"'
+    return response
+
+
+@staff_member_required
 def update_order_status(request, order_number):
     
     if request.method == 'POST':
-        order = get_object_or_404(Order, order_number=order_number)
-        data = json.loads(request.body)
-        new_status = data.get('status')
-        
-        if new_status in ['placed', 'preparing', 'ready', 'completed']:
-            order.status = new_status
-            order.save()
-            return JsonResponse({'success': True, 'status': order.status})
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'invalid_json'}, status=400)
+        new_status = data.get('status') if isinstance(data, dict) else None
+
+        result, = apply_status_updates([{'order_number': order_number, 'status': new_status}])
+        if result.get('error') == 'not_found':
+            raise Http404('No such order.')
+        del result['order_number']
+        return JsonResponse(result)
     
     return JsonResponse({'success': False})
 
 
-def get_order_status(request, order_number):
+@staff_member_required
+def update_order_statuses(request):
     
-    order = get_object_or_404(Order, order_number=order_number)
-    return JsonResponse({
-        'status': order.status,
-        'order_number': order.order_number,
-        'total_amount': str(order.total_amount)
-    })
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'invalid_json'}, status=400)
+
+        updates = data.get('updates') if isinstance(data, dict) else data
+        if not isinstance(updates, list) or not all(isinstance(update, dict) for update in updates):
+            return JsonResponse({'success': False, 'error': 'invalid_payload'}, status=400)
+
+        return JsonResponse({'success': True, 'results': apply_status_updates(updates)})
+    
+    return JsonResponse({'success': False})
+
+
+@staff_member_required
+def ingest_order_batch(request):
+    
+    if request.method != 'POST':
+        return JsonResponse({'success': False}, status=405)
+    if request.content_type != 'application/json':
+        return JsonResponse({'success': False, 'error': 'unsupported_media_type'}, status=415)
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'invalid_json'}, status=400)
+
+    entries = data.get('orders') if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        return JsonResponse({'success': False, 'error': 'invalid_payload'}, status=400)
+    if len(entries) > MAX_INGEST_BATCH:
+        return JsonResponse({'success': False, 'error': 'batch_too_large', 'max': MAX_INGEST_BATCH}, status=413)
+
+    try:
+        results = ingest_orders(entries)
+    except OperationalError:
+        response = JsonResponse({'success': False, 'error': 'busy'}, status=503)
+        response['Retry-After'] = '1'
+        return response
+    return JsonResponse({'success': True, 'results': results})
+
+
+async def _status_response(request, order_number, etag, body):
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    if etag_status(etag) in QUEUED_STATUSES:
+        estimate = await wait_times.aestimate(order_number)
+        if estimate is not None:
+            response['X-Estimated-Ready-At'] = estimate['estimated_ready_at']
+            response['X-Estimated-Ready-By'] = estimate['estimated_ready_by']
+            response['X-Poll-After'] = str(estimate['poll_after'])
+    return response
+
+
+async def get_order_status(request, order_number):
+    
+    etag = await status_versions.acurrent_etag(order_number)
+    if etag is not None:
+        body = status_versions.body(order_number, etag)
+        if body is not None or etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return await _status_response(request, order_number, etag, body)
+
+    order = await afind_order(order_number)
+    etag, body = await status_versions.astore(order, overwrite=False)
+    return await _status_response(request, order_number, etag, body)
+
+
+async def order_status_stream(request, order_number):
+    
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    status = await acurrent_status(order_number)
+    if status is None:
+        raise Http404('No Order matches the given query.')
+
+    response = StreamingHttpResponse(status_events(order_number, status), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@staff_member_required
+def kitchen_queue(request):
+    
+    return render(request, 'ordering/kitchen_queue.html', {'orders': active_orders.orders()})
+
+
+@staff_member_required
+def kitchen_queue_api(request):
+    
+    return JsonResponse({'orders': active_orders.orders()})
+
+
+def _parse_day(value, default):
+
+    try:
+        return date.fromisoformat(value) if value else default
+    except ValueError:
+        return default
+
+
+@staff_member_required
+def sales_dashboard(request):
+    
+    today = timezone.localdate()
+    end_day = _parse_day(request.GET.get('end'), today)
+    start_day = _parse_day(request.GET.get('start'), end_day - timedelta(days=6))
+    summary = summarize(start_day, end_day)
+
+    menu = get_menu()
+    names = {
+        'drink': {str(drink.id): drink.name for drink in menu.drinks},
+        'size': {str(size.id): size.name for size in menu.sizes},
+        'topping': {str(topping.id): topping.name for topping in menu.toppings},
+        'payment_method': dict(Payment.PAYMENT_METHOD_CHOICES),
+    }
+    for dimension, rows in summary.items():
+        for row in rows:
+            row['name'] = names[dimension].get(row['key'], f'#{row["key"]}')
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'start': start_day.isoformat(),
+            'end': end_day.isoformat(),
+            'summary': {
+                dimension: [dict(row, revenue=str(row['revenue'])) for row in rows]
+                for dimension, rows in summary.items()
+            },
+        })
+
+    context = {
+        'start': start_day,
+        'end': end_day,
+        'sections': [(label, summary[dimension]) for dimension, label in SalesRollup.DIMENSION_CHOICES],
+        'total_revenue': sum((row['revenue'] for row in summary['payment_method']), Decimal('0.00')),
+    }
+    return render(request, 'ordering/sales_dashboard.html', context)
+
+
+@staff_member_required
+def order_history(request):
+
+    try:
+        filters = parse_filters(request.GET)
+        cursor = decode_cursor(request.GET.get('cursor'))
+        limit = parse_limit(request.GET.get('limit'))
+    except HistoryError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    if request.GET.get('format') == 'ndjson':
+        rows = aiter_ndjson(filters, cursor) if isinstance(request, ASGIRequest) else iter_ndjson(filters, cursor)
+        response = StreamingHttpResponse(rows, content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="orders.ndjson"'
+        return response
+
+    orders, next_cursor = history_page(filters, cursor, limit)
+    return JsonResponse({'orders': orders, 'next_cursor': next_cursor})
+
+
+@staff_member_required
+def catalog_stats(request):
+    
+    return JsonResponse(menu_catalog.stats())
+
+
+@staff_member_required
+def metrics(request):
+
+    stats = menu_catalog.stats()
+    gauges = [
+        ('catalog_version', 'gauge', 'Current menu catalog version.', stats['version']),
+        ('catalog_hits_total', 'counter', 'Catalog reads served from the in-process snapshot.', stats['hits']),
+        ('catalog_misses_total', 'counter', 'Catalog reads that had to refresh the snapshot.', stats['misses']),
+        ('catalog_loads_total', 'counter', 'Catalog snapshots loaded from the database.', stats['loads']),
+    ]
+    estimator = wait_times.stats()
+    gauges += [
+        ('wait_time_observed_total', 'counter', 'Ready orders folded into the wait-time statistics.', estimator['observed']),
+        ('wait_time_update_seconds_total', 'counter', 'Time spent folding ready orders into the statistics.', estimator['update_seconds']),
+        ('wait_time_queue_length', 'gauge', 'Queued orders at the last wait-time schedule.', estimator['queue_length']),
+    ]
+    return HttpResponse(metrics_registry.render(gauges), content_type='text/plain; version=0.0.4; charset=utf-8')
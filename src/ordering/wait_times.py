@@ -0,0 +1,324 @@
+"""
+Wait-time estimates for orders in the kitchen queue.
+
+Every order that reaches ``ready`` is folded into running statistics of
+how long the kitchen takes per drink and size. The statistics are an
+exponentially weighted mean and mean deviation, the pair TCP keeps for
+round-trip times. An order's prep time runs from when it was marked
+``preparing``, or else from when a station came free for it, to when it
+was marked ``ready``. A station comes free when the order
+``KITCHEN_STATIONS`` places ahead is ready. The time is split across the
+line items in proportion to what the model expected for each.
+
+A prediction replays the active queue from the kitchen index over the
+stations, first in first out, and returns when the order should come
+off with an upper bound two deviations later. The statistics and the
+schedule live in memory. The estimator follows the kitchen generation
+counter, reads orders that any process marked ready since it last
+looked, and rebuilds the schedule only when the queue or the clock has
+moved on. Each rebuild replaces an immutable schedule snapshot, so
+lookups read it without a lock and only a rebuild takes one. Async
+callers, such as every status stream woken by one transition, check the
+counter at most once a second and hand a rebuild to a worker thread, so
+the event loop never waits on the lock or the database. While that
+rebuild runs, other async callers are served the previous schedule.
+"""
+
+import heapq
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .kitchen import GENERATION_KEY, active_orders
+from .models import Order, OrderItem
+
+
+QUEUED_STATUSES = {'placed', 'preparing'}
+
+ALPHA = 0.1
+SPREAD = 2
+DEFAULT_PREP_SECONDS = 120.0
+MAX_PREP_SECONDS = 30 * 60
+
+WARM_UP_ORDERS = 2000
+CATCH_UP_BATCH = 1000
+SCHEDULE_TTL = 5.0
+GENERATION_CHECK_SECONDS = 1.0
+
+MIN_POLL_SECONDS = 3
+MAX_POLL_SECONDS = 60
+
+
+class PrepStats:
+
+    __slots__ = ('mean', 'deviation', 'count')
+
+    def __init__(self):
+        self.mean = 0.0
+        self.deviation = 0.0
+        self.count = 0
+
+    def observe(self, seconds, alpha):
+        if not self.count:
+            self.mean = seconds
+            self.deviation = seconds / 2
+        else:
+            error = seconds - self.mean
+            self.mean += alpha * error
+            self.deviation += alpha * (abs(error) - self.deviation)
+        self.count += 1
+
+
+class WaitTimeModel:
+    """Prep-time statistics and the queue schedule, without any I/O.
+
+    Times are seconds since the epoch. Line items are
+    ``(drink_id, size_id, quantity)`` tuples.
+    """
+
+    def __init__(self, stations=1, alpha=ALPHA, default=DEFAULT_PREP_SECONDS):
+        self.stations = max(1, stations)
+        self.alpha = alpha
+        self.default = default
+        self.items = {}
+        self.drinks = {}
+        self.overall = PrepStats()
+        self.recent_ready = deque(maxlen=self.stations)
+
+    def unit(self, drink_id, size_id):
+        for stats in (self.items.get((drink_id, size_id)), self.drinks.get(drink_id), self.overall):
+            if stats is not None and stats.count:
+                return stats.mean, stats.deviation
+        return self.default, self.default / 2
+
+    def service_time(self, items):
+        if not items:
+            return self.unit(None, None)
+        mean = variance = 0.0
+        for drink_id, size_id, quantity in items:
+            unit_mean, unit_deviation = self.unit(drink_id, size_id)
+            mean += quantity * unit_mean
+            variance += quantity * unit_deviation ** 2
+        return mean, math.sqrt(variance)
+
+    def observe(self, created_at, ready_at, items, preparing_at=None):
+        """Fold in an order that became ready. Call in ``ready_at`` order."""
+
+        if preparing_at is not None and created_at <= preparing_at <= ready_at:
+            start = preparing_at
+        elif len(self.recent_ready) == self.stations:
+            start = max(created_at, self.recent_ready[0])
+        else:
+            start = created_at
+        self.recent_ready.append(ready_at)
+
+        seconds = min(ready_at - start, MAX_PREP_SECONDS)
+        items = [item for item in items if item[2] > 0]
+        if seconds <= 0 or not items:
+            return
+
+        expected = [quantity * self.unit(drink_id, size_id)[0] for drink_id, size_id, quantity in items]
+        total = sum(expected)
+        for (drink_id, size_id, quantity), share in zip(items, expected):
+            unit = seconds * share / total / quantity
+            self.items.setdefault((drink_id, size_id), PrepStats()).observe(unit, self.alpha)
+            self.drinks.setdefault(drink_id, PrepStats()).observe(unit, self.alpha)
+            self.overall.observe(unit, self.alpha)
+
+    def schedule(self, queue, now):
+        """Return ``{order_number: (ready_at, ready_by)}`` for queued orders in kitchen order.
+
+        ``queue`` holds ``(order_number, created_at, items)`` tuples.
+        """
+
+        free = [(ready_at, 0.0) for ready_at in self.recent_ready]
+        free += [(0.0, 0.0)] * (self.stations - len(free))
+        heapq.heapify(free)
+
+        predictions = {}
+        for order_number, created_at, items in queue:
+            free_at, variance = heapq.heappop(free)
+            mean, deviation = self.service_time(items)
+            ready_at = max(max(created_at, free_at) + mean, now)
+            variance = variance + deviation ** 2 if free_at > now else deviation ** 2
+            predictions[order_number] = (ready_at, ready_at + SPREAD * math.sqrt(variance))
+            heapq.heappush(free, (ready_at, variance))
+        return predictions
+
+
+def ready_orders(after=None):
+    """Orders marked ready after the ``(ready_at, pk)`` key ``after``, oldest first."""
+
+    queryset = Order.objects.filter(ready_at__isnull=False)
+    if after is not None:
+        ready_at, pk = after
+        queryset = queryset.filter(Q(ready_at__gte=ready_at) & (Q(ready_at__gt=ready_at) | Q(pk__gt=pk)))
+    return queryset.order_by('ready_at', 'pk').values_list('pk', 'created_at', 'preparing_at', 'ready_at')
+
+
+def _timestamp(value):
+    return value.timestamp() if value is not None else None
+
+
+def _isoformat(timestamp):
+    return datetime.fromtimestamp(timestamp, dt_timezone.utc).isoformat()
+
+
+def describe_wait(estimate, now=None):
+    now = time.time() if now is None else now
+    low = max(0, round((datetime.fromisoformat(estimate['estimated_ready_at']).timestamp() - now) / 60))
+    high = max(low, round((datetime.fromisoformat(estimate['estimated_ready_by']).timestamp() - now) / 60))
+    if high < 1:
+        return 'Any moment now'
+    if low == high:
+        return f'About {low} minute{"" if low == 1 else "s"}'
+    return f'{max(low, 1)}-{high} minutes'
+
+
+@dataclass(frozen=True)
+class QueueSchedule:
+
+    generation: object
+    computed: float
+    entries: dict
+    queue_length: int
+
+    def fresh(self, generation, now):
+        return generation == self.generation and now - self.computed < SCHEDULE_TTL
+
+    def lookup(self, order_number, now):
+        entry = self.entries.get(order_number)
+        if entry is None:
+            return None
+        position, ready_at, ready_at_iso, ready_by_iso = entry
+        wait = max(0.0, ready_at - now)
+        return {
+            'estimated_ready_at': ready_at_iso,
+            'estimated_ready_by': ready_by_iso,
+            'estimated_wait_seconds': round(wait),
+            'queue_position': position,
+            'queue_length': self.queue_length,
+            'poll_after': max(MIN_POLL_SECONDS, min(MAX_POLL_SECONDS, round(wait / 2))),
+        }
+
+
+class WaitTimeEstimator:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._model = None
+        self._watermark = None
+        self._schedule = None
+        self._checked = 0.0
+        self._checked_generation = None
+        self._refreshing = False
+        self.updates = 0
+        self.update_seconds = 0.0
+
+    def _ready_orders(self, limit, after=None):
+        if after is None:
+            rows = list(ready_orders().reverse()[:limit])[::-1]
+        else:
+            rows = list(ready_orders(after)[:limit])
+
+        items = {}
+        for order_id, drink_id, size_id, quantity in OrderItem.objects.filter(
+            order_id__in=[row[0] for row in rows],
+        ).values_list('order_id', 'drink_id', 'size_id', 'quantity'):
+            items.setdefault(order_id, []).append((drink_id, size_id, quantity))
+        return rows, items
+
+    def _catch_up(self):
+        limit = WARM_UP_ORDERS if self._watermark is None else CATCH_UP_BATCH
+        while True:
+            rows, items = self._ready_orders(limit, self._watermark)
+            start = time.perf_counter()
+            for pk, created_at, preparing_at, ready_at in rows:
+                self._model.observe(
+                    created_at.timestamp(), ready_at.timestamp(), items.get(pk, ()), _timestamp(preparing_at),
+                )
+            self.update_seconds += time.perf_counter() - start
+            self.updates += len(rows)
+            if rows:
+                self._watermark = (rows[-1][3], rows[-1][0])
+            if len(rows) < CATCH_UP_BATCH:
+                return
+            limit = CATCH_UP_BATCH
+
+    def _refresh(self, generation, now):
+        schedule = self._schedule
+        if schedule is None:
+            if self._model is None:
+                self._model = WaitTimeModel(stations=getattr(settings, 'KITCHEN_STATIONS', 1))
+            self._catch_up()
+        elif generation != schedule.generation:
+            self._catch_up()
+        elif now - schedule.computed < SCHEDULE_TTL:
+            return schedule
+
+        queue = [
+            (
+                order['order_number'],
+                datetime.fromisoformat(order['created_at']).timestamp(),
+                [(item['drink_id'], item['size_id'], item['quantity']) for item in order['items']],
+            )
+            for order in active_orders.orders() if order['status'] in QUEUED_STATUSES
+        ]
+        self._schedule = QueueSchedule(
+            generation=generation,
+            computed=now,
+            entries={
+                order_number: (position, ready_at, _isoformat(ready_at), _isoformat(ready_by))
+                for position, (order_number, (ready_at, ready_by)) in enumerate(self._model.schedule(queue, now).items(), 1)
+            },
+            queue_length=len(queue),
+        )
+        return self._schedule
+
+    def estimate(self, order_number, generation=None):
+        """Return the predicted ready time of a queued order, or ``None`` once it has left the queue."""
+
+        now = time.time()
+        if generation is None:
+            generation = cache.get(GENERATION_KEY)
+            self._checked_generation, self._checked = generation, now
+        schedule = self._schedule
+        if schedule is None or not schedule.fresh(generation, now):
+            with self._lock:
+                schedule = self._refresh(generation, now)
+        return schedule.lookup(order_number, now)
+
+    async def aestimate(self, order_number):
+        now = time.time()
+        if now - self._checked >= GENERATION_CHECK_SECONDS:
+            self._checked = now
+            self._checked_generation = await cache.aget(GENERATION_KEY)
+        generation = self._checked_generation
+        schedule = self._schedule
+        if schedule is not None and (self._refreshing or schedule.fresh(generation, now)):
+            return schedule.lookup(order_number, now)
+
+        self._refreshing = True
+        try:
+            return await sync_to_async(self.estimate)(order_number, generation)
+        finally:
+            self._refreshing = False
+
+    def stats(self):
+        schedule = self._schedule
+        return {
+            'observed': self.updates,
+            'update_seconds': self.update_seconds,
+            'queue_length': schedule.queue_length if schedule is not None else 0,
+        }
+
+
+wait_times = WaitTimeEstimator()
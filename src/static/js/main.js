@@ -9,27 +9,54 @@ document.addEventListener('DOMContentLoaded', function() {
 });
 
 
+let priceTablePromise = null;
+
+function loadPriceTable(url) {
+    if (!priceTablePromise) {
+        priceTablePromise = fetch(url)
+            .then(response => response.ok ? response.json() : null)
+            .catch(() => null);
+    }
+    return priceTablePromise;
+}
+
 function initializeOrderForm() {
-    const orderForms = document.querySelectorAll('.order-form');
-    
-    orderForms.forEach(form => {
-        const sizeSelect = form.querySelector('select[name="size_id"]');
-        const flavorSelect = form.querySelector('select[name="flavor_id"]');
-        const toppingsCheckboxes = form.querySelectorAll('input[name="toppings"]');
-        const quantityInput = form.querySelector('input[name="quantity"]');
-        
-        if (sizeSelect || flavorSelect || toppingsCheckboxes.length > 0) {
+    const grid = document.querySelector('[data-price-table]');
+    if (!grid) return;
 
-            addPriceCalculation(form);
-        }
+    loadPriceTable(grid.dataset.priceTable).then(table => {
+        if (!table) return;
+
+        grid.querySelectorAll('.order-form').forEach(form => {
+            addPriceCalculation(form, table);
+        });
     });
 }
 
-function addPriceCalculation(form) {
-    const drinkCard = form.closest('.drink-card');
-    const basePriceElement = drinkCard.querySelector('.price');
-    const basePrice = parseFloat(basePriceElement.textContent.replace('₱', '').replace('$', ''));
-    
+function priceUnits(table, form) {
+    const drinkId = form.querySelector('input[name="drink_id"]').value;
+    const sizeSelect = form.querySelector('select[name="size_id"]');
+    let units = (table.base[drinkId] || {})[sizeSelect ? sizeSelect.value : ''];
+    if (units === undefined) return null;
+
+    const flavorSelect = form.querySelector('select[name="flavor_id"]');
+    if (flavorSelect && flavorSelect.value) {
+        const flavorUnits = table.flavors[flavorSelect.value];
+        if (flavorUnits === undefined) return null;
+        units += flavorUnits;
+    }
+
+    for (const checkbox of form.querySelectorAll('input[name="toppings"]:checked')) {
+        const toppingUnits = table.toppings[checkbox.value];
+        if (toppingUnits === undefined) return null;
+        units += toppingUnits;
+    }
+    return units;
+}
+
+function addPriceCalculation(form, table) {
+    const quotedPriceInput = form.querySelector('input[name="quoted_price"]');
+    const unitsPerCent = table.scale / 100;
 
     let totalPriceElement = form.querySelector('.total-price');
     if (!totalPriceElement) {
@@ -40,44 +67,22 @@ function addPriceCalculation(form) {
     }
     
     function calculatePrice() {
-        let totalPrice = basePrice;
-        
-
-        const sizeSelect = form.querySelector('select[name="size_id"]');
-        if (sizeSelect) {
-            const selectedSize = sizeSelect.options[sizeSelect.selectedIndex];
-            const multiplierMatch = selectedSize.text.match(/×([\d.]+)/);
-            if (multiplierMatch) {
-                totalPrice *= parseFloat(multiplierMatch[1]);
-            }
-        }
-        
+        const units = priceUnits(table, form);
+        const quantityInput = form.querySelector('input[name="quantity"]');
+        const quantity = Math.max(1, quantityInput ? parseInt(quantityInput.value) || 1 : 1);
 
-        const flavorSelect = form.querySelector('select[name="flavor_id"]');
-        if (flavorSelect && flavorSelect.value) {
-            const selectedFlavor = flavorSelect.options[flavorSelect.selectedIndex];
-            const priceMatch = selectedFlavor.text.match(/\+[₱$]([\d.]+)/);
-            if (priceMatch) {
-                totalPrice += parseFloat(priceMatch[1]);
-            }
+        if (units === null) {
+            totalPriceElement.textContent = '';
+            if (quotedPriceInput) quotedPriceInput.value = '';
+            return;
         }
-        
 
-        const toppingsCheckboxes = form.querySelectorAll('input[name="toppings"]:checked');
-        toppingsCheckboxes.forEach(checkbox => {
-            const label = checkbox.closest('label');
-            const priceMatch = label.textContent.match(/\+[₱$]([\d.]+)/);
-            if (priceMatch) {
-                totalPrice += parseFloat(priceMatch[1]);
-            }
-        });
-        
+        // Round half up to cents in integer arithmetic, the same way the server does.
+        const cents = Math.floor((2 * units * quantity + unitsPerCent) / (2 * unitsPerCent));
+        const price = `${Math.floor(cents / 100)}.${String(cents % 100).padStart(2, '0')}`;
 
-        const quantityInput = form.querySelector('input[name="quantity"]');
-        const quantity = quantityInput ? parseInt(quantityInput.value) || 1 : 1;
-        totalPrice *= quantity;
-        
-        totalPriceElement.textContent = `Total: ₱${totalPrice.toFixed(2)}`;
+        totalPriceElement.textContent = `Total: ₱${price}`;
+        if (quotedPriceInput) quotedPriceInput.value = price;
     }
     
 